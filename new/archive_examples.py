@@ -9,6 +9,11 @@ Key Features:
 3. Анализ метаданных архива
 4. Выявление подозрительных файлов (например, исполняемые)
 5. Экспорт данных в CSV/JSON
+6. Потоковый поиск по большим архивам (смещения и номера строк)
+7. Параллельное сканирование ZIP по файлам и конвейер для tar.gz
+8. Сессия архива: однократное чтение оглавления и индекс точек gzip
+9. Рекурсивный обход вложенных архивов с дедупликацией по хешу
+10. Загрузка файлов в контентно-адресуемое хранилище
 
 Типичные кейсы:
 - Анализ архивов с утечками данных
@@ -18,9 +23,62 @@ Key Features:
 
 import zipfile
 import tarfile
+import bz2
+import gzip
+import hashlib
+import heapq
+import io
+import lzma
 import pandas as pd
 import os
 import re
+import tempfile
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dedup_examples import ContentStore
+
+# Параметры потокового поиска
+SEARCH_CHUNK_SIZE = 1024 * 1024
+SEARCH_OVERLAP = 4096
+BINARY_SNIFF_SIZE = 8192
+
+# Расширения, по которым detect_executable_files отмечает исполняемые файлы
+ZIP_EXECUTABLE_EXT = ('.exe', '.bat', '.sh', '.ps1')
+TAR_EXECUTABLE_EXT = ('.sh', '.py', '.pl')
+
+# Шаг точек возобновления распаковки gzip (в байтах распакованных данных)
+GZIP_CHECKPOINT_INTERVAL = 64 * 1024 * 1024
+
+# Сигнатуры архивов и сжатых потоков (tar определяется по 'ustar' на смещении 257)
+ARCHIVE_MAGIC = (
+    (b'PK\x03\x04', 'zip'),
+    (b'PK\x05\x06', 'zip'),
+    (b'\x1f\x8b', 'gz'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'7z\xbc\xaf\x27\x1c', '7z'),
+)
+
+COMPRESSED_EXT = {
+    'gz': (('.tgz', '.tar'), ('.gz', '')),
+    'bz2': (('.tbz2', '.tar'), ('.bz2', '')),
+    'xz': (('.txz', '.tar'), ('.xz', '')),
+}
+
+# Ограничения рекурсивного обхода вложенных архивов
+NESTED_MAX_DEPTH = 5
+NESTED_MAX_MEMBER_SIZE = 256 * 1024 * 1024
+NESTED_MAX_TOTAL_SIZE = 4 * 1024 * 1024 * 1024
+
+# Ошибки чтения повреждённых архивов и их файлов при рекурсивном обходе
+NESTED_READ_ERRORS = (zipfile.BadZipFile, tarfile.TarError, OSError, EOFError, lzma.LZMAError, ValueError)
+
+# Сигнатуры исполняемых файлов: PE, ELF, скрипты, Mach-O
+EXECUTABLE_MAGIC = (b'MZ', b'\x7fELF', b'#!', b'\xca\xfe\xba\xbe',
+                    b'\xfe\xed\xfa\xce', b'\xfe\xed\xfa\xcf', b'\xce\xfa\xed\xfe', b'\xcf\xfa\xed\xfe')
 
 def list_archive_files(archive_path):
     """Список файлов в архиве."""
@@ -87,12 +145,12 @@ def detect_executable_files(archive_path):
     if archive_path.endswith('.zip'):
         with zipfile.ZipFile(archive_path, 'r') as z:
             for name in z.namelist():
-                if name.endswith(('.exe', '.bat', '.sh', '.ps1')):
+                if name.endswith(ZIP_EXECUTABLE_EXT):
                     executables.append(name)
     elif archive_path.endswith('.tar.gz'):
         with tarfile.open(archive_path, 'r:gz') as t:
             for member in t.getmembers():
-                if member.name.endswith(('.sh', '.py', '.pl')):
+                if member.name.endswith(TAR_EXECUTABLE_EXT):
                     executables.append(member.name)
     return executables
 
@@ -102,6 +160,578 @@ def export_archive_data_to_csv(archive_path, output_file):
     df = pd.DataFrame(metadata)
     df.to_csv(output_file, index=False)
 
+def iter_archive_members(archive_path):
+    """Потоковый обход файлов архива: (имя, файловый объект), tar.gz распаковывается один раз."""
+    if archive_path.endswith('.zip'):
+        with zipfile.ZipFile(archive_path, 'r') as z:
+            for info in z.infolist():
+                if not info.is_dir():
+                    with z.open(info) as f:
+                        yield info.filename, f
+    elif archive_path.endswith('.tar.gz'):
+        # Режим 'r|gz' читает поток последовательно, без перемоток
+        with tarfile.open(archive_path, 'r|gz') as t:
+            for member in t:
+                if member.isfile():
+                    f = t.extractfile(member)
+                    if f is not None:
+                        yield member.name, f
+
+def compile_search_pattern(pattern, ignore_case=True):
+    """Компиляция шаблона поиска: байтовое выражение или строковое для не-ASCII без учёта регистра.
+
+    Байтовый IGNORECASE сворачивает только ASCII, поэтому шаблоны вроде 'пароль'
+    компилируются как str и ищутся по декодированному тексту порции.
+    """
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    if isinstance(pattern, bytes) and ignore_case and not pattern.isascii():
+        pattern = pattern.decode('utf-8')
+    if isinstance(pattern, str) and not (ignore_case and not pattern.isascii()):
+        pattern = pattern.encode('utf-8')
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+def is_binary_chunk(data):
+    """Эвристика двоичного содержимого: нулевой байт в начале файла."""
+    return b'\x00' in data[:BINARY_SNIFF_SIZE]
+
+def is_executable_header(head):
+    """Проверка сигнатуры исполняемого файла по первым байтам."""
+    return head.startswith(EXECUTABLE_MAGIC)
+
+def iter_scan_blocks(f, chunk_size=SEARCH_CHUNK_SIZE, overlap=SEARCH_OVERLAP, skip_binary=True):
+    """Порции файла с перекрытием: (данные, смещение, номер строки, граница поиска)."""
+    data = b''
+    data_start = 0
+    line_no = 1
+    first = True
+    while True:
+        chunk = f.read(chunk_size)
+        if first:
+            first = False
+            if skip_binary and is_binary_chunk(chunk):
+                return
+        data += chunk
+        final = not chunk
+        # Совпадения в хвосте перекрытия проверяются на следующей порции
+        limit = len(data) if final else max(0, len(data) - overlap)
+        if limit:
+            yield data, data_start, line_no, limit
+        if final:
+            return
+        line_no += data.count(b'\n', 0, limit)
+        data_start += limit
+        data = data[limit:]
+
+def _scan_text_block(regex, data, data_start, line_no, limit):
+    """Поиск строковым выражением: смещения пересчитываются обратно в байты."""
+    # surrogateescape сохраняет длину недекодируемых байт (в том числе разрезанных символов)
+    text = data.decode('utf-8', errors='surrogateescape')
+    results = []
+    pos = 0
+    byte_pos = 0
+    for m in regex.finditer(text):
+        byte_pos += len(text[pos:m.start()].encode('utf-8', errors='surrogateescape'))
+        if byte_pos >= limit:
+            break
+        line_no += text.count('\n', pos, m.start())
+        pos = m.start()
+        raw = m.group().encode('utf-8', errors='surrogateescape')
+        start = data_start + byte_pos
+        results.append((start, line_no, raw.decode('utf-8', errors='replace'), start + len(raw)))
+    return results
+
+def scan_block(regex, data, data_start, line_no, limit):
+    """Поиск в одной порции: (смещение, номер строки, совпадение, конец) для начавшихся до limit."""
+    if isinstance(regex.pattern, str):
+        return _scan_text_block(regex, data, data_start, line_no, limit)
+    results = []
+    pos = 0
+    for m in regex.finditer(data):
+        if m.start() >= limit:
+            break
+        line_no += data.count(b'\n', pos, m.start())
+        pos = m.start()
+        results.append((data_start + m.start(), line_no, m.group().decode('utf-8', errors='replace'),
+                        data_start + m.end()))
+    return results
+
+def _skip_overlapping(results, last_end):
+    """Отбрасывание совпадений внутри уже найденного: длинное совпадение у границы
+    порции заходит в перекрытие, и следующая порция находит его хвост ещё раз."""
+    kept = []
+    for offset, line_no, match, end in results:
+        if offset >= last_end:
+            kept.append((offset, line_no, match))
+            last_end = end
+    return kept, last_end
+
+def search_in_stream(f, regex, chunk_size=SEARCH_CHUNK_SIZE, overlap=SEARCH_OVERLAP, skip_binary=True):
+    """Поиск в файловом объекте порциями с перекрытием: (смещение, номер строки, совпадение)."""
+    last_end = 0
+    for block in iter_scan_blocks(f, chunk_size, overlap, skip_binary):
+        results, last_end = _skip_overlapping(scan_block(regex, *block), last_end)
+        yield from results
+
+def search_in_archive_stream(archive_path, pattern, ignore_case=True, chunk_size=SEARCH_CHUNK_SIZE,
+                             overlap=SEARCH_OVERLAP, skip_binary=True):
+    """Потоковый поиск по содержимому архива со смещениями и номерами строк."""
+    regex = compile_search_pattern(pattern, ignore_case)
+    results = []
+    for name, f in iter_archive_members(archive_path):
+        for offset, line_no, match in search_in_stream(f, regex, chunk_size, overlap, skip_binary):
+            results.append({'member': name, 'offset': offset, 'line': line_no, 'match': match})
+    return results
+
+def balance_by_size(items, n_bins):
+    """Распределение (имя, размер) по n_bins корзинам с выравниванием суммарного размера."""
+    bins = [[] for _ in range(n_bins)]
+    heap = [(0, i) for i in range(n_bins)]
+    for name, size in sorted(items, key=lambda item: item[1], reverse=True):
+        load, i = heapq.heappop(heap)
+        bins[i].append(name)
+        heapq.heappush(heap, (load + size, i))
+    return [b for b in bins if b]
+
+def _scan_zip_members(archive_path, names, regex, chunk_size, overlap, skip_binary):
+    """Сканирование части ZIP-архива в отдельном процессе со своим дескриптором."""
+    matches = []
+    executables = []
+    with zipfile.ZipFile(archive_path, 'r') as z:
+        for name in names:
+            with z.open(name) as f:
+                if name.endswith(ZIP_EXECUTABLE_EXT) or is_executable_header(f.peek(4)[:4]):
+                    executables.append(name)
+                for offset, line_no, match in search_in_stream(f, regex, chunk_size, overlap, skip_binary):
+                    matches.append({'member': name, 'offset': offset, 'line': line_no, 'match': match})
+    return matches, executables
+
+def _scan_tar_pipelined(archive_path, regex, pool, workers, chunk_size, overlap, skip_binary):
+    """Конвейер для tar.gz: распаковка в текущем процессе, поиск по порциям в пуле."""
+    matches = []
+    executables = []
+    pending = deque()
+    last_end = 0
+
+    def drain(max_pending):
+        nonlocal last_end
+        while len(pending) > max_pending:
+            name, data_start, future = pending.popleft()
+            # Порции приходят по порядку; первая порция файла начинается со смещения 0
+            if data_start == 0:
+                last_end = 0
+            results, last_end = _skip_overlapping(future.result(), last_end)
+            for offset, line_no, match in results:
+                matches.append({'member': name, 'offset': offset, 'line': line_no, 'match': match})
+
+    with tarfile.open(archive_path, 'r|gz') as t:
+        for member in t:
+            if not member.isfile():
+                continue
+            f = t.extractfile(member)
+            if f is None:
+                continue
+            if member.name.endswith(TAR_EXECUTABLE_EXT) or is_executable_header(f.peek(4)[:4]):
+                executables.append(member.name)
+            for block in iter_scan_blocks(f, chunk_size, overlap, skip_binary):
+                pending.append((member.name, block[1], pool.submit(scan_block, regex, *block)))
+                # Ограничиваем число порций в очереди, чтобы память не росла
+                drain(2 * workers)
+    drain(0)
+    return matches, executables
+
+def scan_archive_parallel(archive_path, pattern, workers=None, ignore_case=True,
+                          chunk_size=SEARCH_CHUNK_SIZE, overlap=SEARCH_OVERLAP, skip_binary=True):
+    """Параллельный поиск и выявление исполняемых файлов (по расширению и сигнатуре) в архиве."""
+    regex = compile_search_pattern(pattern, ignore_case)
+    workers = workers or os.cpu_count() or 1
+    matches = []
+    executables = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if archive_path.endswith('.zip'):
+            with zipfile.ZipFile(archive_path, 'r') as z:
+                infos = [info for info in z.infolist() if not info.is_dir()]
+            order = {info.filename: i for i, info in enumerate(infos)}
+            parts = balance_by_size([(info.filename, info.compress_size) for info in infos], workers)
+            futures = [pool.submit(_scan_zip_members, archive_path, names, regex,
+                                   chunk_size, overlap, skip_binary) for names in parts]
+            for future in futures:
+                part_matches, part_executables = future.result()
+                matches.extend(part_matches)
+                executables.extend(part_executables)
+            # Порядок результатов — как в архиве, независимо от распределения
+            matches.sort(key=lambda m: (order[m['member']], m['offset']))
+            executables.sort(key=order.get)
+        elif archive_path.endswith('.tar.gz'):
+            matches, executables = _scan_tar_pipelined(archive_path, regex, pool, workers,
+                                                       chunk_size, overlap, skip_binary)
+
+    return {'matches': matches, 'executables': executables}
+
+class _GzipCheckpointReader:
+    """Распаковка gzip-потока с сохранением точек возобновления (копий состояния zlib)."""
+
+    def __init__(self, f, interval=GZIP_CHECKPOINT_INTERVAL, block_size=1024 * 1024):
+        self.f = f
+        self.interval = interval
+        self.block_size = block_size
+        self.decompressor = zlib.decompressobj(wbits=31)
+        # Ещё не распакованные сжатые данные (unconsumed_tail или очередной блок)
+        self.pending = b''
+        self.buffer = bytearray()
+        self.pos = 0
+        self.out_pos = 0
+        self.checkpoints = [(0, 0, self.decompressor.copy())]
+
+    def _fill(self):
+        """Распаковка не более block_size байт; False — поток закончился."""
+        if not self.pending:
+            self.pending = self.f.read(self.block_size)
+            if not self.pending:
+                return False
+        # max_length ограничивает выход: бомба не попадёт в память целиком
+        data = self.decompressor.decompress(self.pending, self.block_size)
+        self.pending = self.decompressor.unconsumed_tail
+        if self.decompressor.eof:
+            # Склеенные gzip-члены: начинаем новый поток с остатка данных
+            self.pending = self.decompressor.unused_data
+            self.decompressor = zlib.decompressobj(wbits=31)
+        self.buffer += data
+        self.out_pos += len(data)
+        if self.out_pos - self.checkpoints[-1][1] >= self.interval:
+            # Позиция — реально поглощённые сжатые данные, без необработанного остатка
+            self.checkpoints.append((self.f.tell() - len(self.pending), self.out_pos, self.decompressor.copy()))
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) - self.pos < size:
+            if not self._fill():
+                break
+        end = len(self.buffer) if size < 0 else min(self.pos + size, len(self.buffer))
+        result = bytes(self.buffer[self.pos:end])
+        self.pos = end
+        # Прочитанное удаляем изредка, чтобы не копировать буфер на каждом вызове
+        if self.pos > self.block_size and self.pos * 2 > len(self.buffer):
+            del self.buffer[:self.pos]
+            self.pos = 0
+        return result
+
+class ArchiveSession:
+    """Сессия архива: оглавление читается один раз и хранится в компактных массивах.
+
+    Для tar.gz во время единственного прохода запоминаются точки
+    возобновления gzip, поэтому извлечение файла начинается с ближайшей
+    точки, а не с начала потока.
+    """
+
+    def __init__(self, archive_path, checkpoint_interval=GZIP_CHECKPOINT_INTERVAL):
+        self.archive_path = archive_path
+        self.names = []
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.is_file = array('b')
+        self.data_offsets = array('q')
+        self.date_times = []
+        self.checkpoints = []
+        self._zip = None
+        if archive_path.endswith('.zip'):
+            self.kind = 'zip'
+            self._load_zip()
+        elif archive_path.endswith('.tar.gz'):
+            self.kind = 'tar.gz'
+            self._load_tar_gz(checkpoint_interval)
+        else:
+            raise ValueError(f"Неподдерживаемый формат архива: {archive_path}")
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    def _load_zip(self):
+        """Чтение центрального каталога ZIP."""
+        self._zip = zipfile.ZipFile(self.archive_path, 'r')
+        for info in self._zip.infolist():
+            self.names.append(info.filename)
+            self.sizes.append(info.file_size)
+            self.date_times.append(info.date_time)
+            self.is_file.append(0 if info.is_dir() else 1)
+
+    def _load_tar_gz(self, checkpoint_interval):
+        """Один проход по заголовкам tar с запоминанием точек возобновления gzip."""
+        with open(self.archive_path, 'rb') as f:
+            reader = _GzipCheckpointReader(f, checkpoint_interval)
+            with tarfile.open(fileobj=reader, mode='r|') as t:
+                for member in t:
+                    self.names.append(member.name)
+                    self.sizes.append(member.size)
+                    self.mtimes.append(member.mtime)
+                    self.is_file.append(1 if member.isfile() else 0)
+                    self.data_offsets.append(member.offset_data)
+            self.checkpoints = reader.checkpoints
+        self._checkpoint_positions = [cp[1] for cp in self.checkpoints]
+
+    def close(self):
+        """Закрытие открытых дескрипторов."""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def list_files(self):
+        """Список файлов в архиве (из кэша)."""
+        return list(self.names)
+
+    def metadata(self):
+        """Метаданные файлов (размеры, даты) из кэша."""
+        if self.kind == 'zip':
+            modified = self.date_times
+        else:
+            modified = [int(m) for m in self.mtimes]
+        return [{'filename': name, 'size': size, 'modified': mod}
+                for name, size, mod in zip(self.names, self.sizes, modified)]
+
+    def detect_executables(self):
+        """Выявление исполняемых файлов по расширению (из кэша)."""
+        extensions = ZIP_EXECUTABLE_EXT if self.kind == 'zip' else TAR_EXECUTABLE_EXT
+        return [name for name in self.names if name.endswith(extensions)]
+
+    def read_member(self, filename):
+        """Чтение содержимого файла архива."""
+        i = self._index[filename]
+        if self.kind == 'zip':
+            return self._zip.read(filename)
+        if not self.is_file[i]:
+            raise ValueError(f"{filename} не является обычным файлом")
+
+        # Возобновляем распаковку с ближайшей точки перед началом данных
+        start, size = self.data_offsets[i], self.sizes[i]
+        comp_pos, out_pos, state = self.checkpoints[bisect_right(self._checkpoint_positions, start) - 1]
+        with open(self.archive_path, 'rb') as f:
+            f.seek(comp_pos)
+            reader = _GzipCheckpointReader(f, interval=float('inf'))
+            reader.decompressor = state.copy()
+            skip = start - out_pos
+            while skip > 0:
+                skipped = len(reader.read(min(skip, 16 * 1024 * 1024)))
+                if not skipped:
+                    break
+                skip -= skipped
+            return reader.read(size)
+
+    def extract(self, filename, output_path):
+        """Извлечение файла в каталог (с защитой от выхода за его пределы)."""
+        target = os.path.realpath(os.path.join(output_path, filename))
+        if not target.startswith(os.path.realpath(output_path) + os.sep):
+            raise ValueError(f"Недопустимый путь в архиве: {filename}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as out:
+            out.write(self.read_member(filename))
+        return target
+
+def detect_archive_format(head):
+    """Определение формата архива по сигнатуре (магическим байтам)."""
+    for magic, fmt in ARCHIVE_MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if head[257:262] == b'ustar':
+        return 'tar'
+    return None
+
+def _read_limited(f, limit):
+    """Чтение не более limit байт; None, если данных больше."""
+    data = f.read(limit + 1)
+    return data if len(data) <= limit else None
+
+def _strip_compression_ext(label, fmt):
+    """Имя содержимого сжатого потока: a.txt.gz -> a.txt, a.tgz -> a.tar."""
+    for ext, replacement in COMPRESSED_EXT[fmt]:
+        if label.endswith(ext):
+            return label[:-len(ext)] + replacement
+    return label + '!<data>'
+
+class _SevenZipSpool:
+    """Фабрика приёмников py7zr: файлы пишутся подряд в один временный файл, не больше limit каждый."""
+
+    def __init__(self, limit=0):
+        self.limit = limit
+        self.file = tempfile.TemporaryFile()
+        # [имя, смещение, записано байт, превышен ли лимит]
+        self.members = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+    def create(self, filename):
+        entry = [filename, self.file.seek(0, io.SEEK_END), 0, False]
+        self.members.append(entry)
+        return _SevenZipSpoolWriter(self, entry)
+
+class _SevenZipSpoolWriter:
+    """Приёмник одного файла: лишние байты сверх лимита отбрасываются с пометкой."""
+
+    def __init__(self, spool, entry):
+        self.spool = spool
+        self.entry = entry
+
+    def write(self, data):
+        room = self.spool.limit - self.entry[2]
+        if len(data) > room:
+            self.entry[3] = True
+            data = data[:max(room, 0)]
+        self.spool.file.write(data)
+        self.entry[2] += len(data)
+        return len(data)
+
+    def read(self, size=None):
+        return b''
+
+    def seek(self, offset, whence=0):
+        return 0
+
+    def flush(self):
+        pass
+
+    def size(self):
+        return self.entry[2]
+
+    def close(self):
+        pass
+
+def _iter_nested_children(fmt, f, label, state):
+    """Вложенные файлы контейнера: (путь, файловый объект или None, если файл превышает лимит)."""
+    if fmt in ('gz', 'bz2', 'xz'):
+        opener = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[fmt]
+        yield _strip_compression_ext(label, fmt), opener(f)
+    elif fmt == 'tar':
+        with tarfile.open(fileobj=f, mode='r|') as t:
+            for member in t:
+                if member.isfile():
+                    member_file = t.extractfile(member)
+                    if member_file is not None:
+                        yield f"{label}!{member.name}", member_file
+    elif fmt == 'zip':
+        with zipfile.ZipFile(f) as z:
+            for info in z.infolist():
+                if not info.is_dir():
+                    with z.open(info) as member_file:
+                        yield f"{label}!{info.filename}", member_file
+    elif fmt == '7z':
+        try:
+            import py7zr
+        except ImportError:
+            raise ValueError("установите py7zr для разбора 7z")
+        spool = _SevenZipSpool()
+        try:
+            with spool, py7zr.SevenZipFile(f, 'r') as z:
+                # Общий лимит проверяется по оглавлению до распаковки
+                planned = state['total']
+                targets = []
+                oversized = []
+                for info in z.list():
+                    if info.is_directory:
+                        continue
+                    limit = min(state['max_member_size'], state['max_total_size'] - planned)
+                    if info.uncompressed > limit:
+                        oversized.append(info.filename)
+                        continue
+                    targets.append(info.filename)
+                    planned += info.uncompressed
+                spool.limit = min(state['max_member_size'], state['max_total_size'] - state['total'])
+                if targets:
+                    # Один проход: в solid-архиве каждый блок распаковывается один раз
+                    z.extract(targets=targets, factory=spool)
+                for name in oversized:
+                    yield f"{label}!{name}", None
+                for name, offset, size, truncated in spool.members:
+                    if truncated:
+                        yield f"{label}!{name}", None
+                        continue
+                    spool.file.seek(offset)
+                    yield f"{label}!{name}", io.BytesIO(spool.file.read(size))
+        except py7zr.exceptions.ArchiveError as e:
+            raise ValueError(f"повреждённый 7z: {e}")
+
+def _walk_nested(label, f, depth, state):
+    """Рекурсивный обход одного файла: спуск в архивы или выдача содержимого."""
+    if state['total'] > state['max_total_size']:
+        yield {'path': label, 'depth': depth, 'error': 'исчерпан общий лимит размера'}
+        return
+
+    if f is None:
+        yield {'path': label, 'depth': depth, 'error': 'файл превышает лимит размера'}
+        return
+
+    if hasattr(f, 'peek'):
+        head = f.peek(512)[:512]
+    else:
+        # Файловые объекты без peek (BytesIO): читаем сигнатуру и возвращаемся
+        position = f.tell()
+        head = f.read(512)
+        f.seek(position)
+    fmt = detect_archive_format(head)
+    if not fmt or depth >= state['max_depth'] or (fmt in ('zip', '7z') and depth > 0):
+        # Обычный файл или вложенный архив с произвольным доступом: читаем в память
+        data = _read_limited(f, state['max_member_size'])
+        if data is None:
+            yield {'path': label, 'depth': depth, 'error': 'файл превышает лимит размера'}
+            return
+        state['total'] += len(data)
+        digest = hashlib.sha256(data).hexdigest()
+        duplicate = digest in state['seen']
+        state['seen'].add(digest)
+        if duplicate or not fmt or depth >= state['max_depth']:
+            yield {'path': label, 'depth': depth, 'size': len(data), 'sha256': digest,
+                   'duplicate': duplicate, 'data': None if duplicate else data}
+            return
+        f = io.BytesIO(data)
+
+    try:
+        for child_label, child in _iter_nested_children(fmt, f, label, state):
+            # Ошибка чтения одного файла (например, неверная CRC) не прерывает обход соседних
+            try:
+                yield from _walk_nested(child_label, child, depth + 1, state)
+            except NESTED_READ_ERRORS as e:
+                yield {'path': child_label, 'depth': depth + 1, 'error': str(e)}
+    except NESTED_READ_ERRORS as e:
+        yield {'path': label, 'depth': depth, 'format': fmt, 'error': str(e)}
+
+def walk_nested_archive(archive_path, max_depth=NESTED_MAX_DEPTH, max_member_size=NESTED_MAX_MEMBER_SIZE,
+                        max_total_size=NESTED_MAX_TOTAL_SIZE, seen=None):
+    """Рекурсивный потоковый обход вложенных архивов (zip/tar/gz/bz2/xz/7z) с дедупликацией по SHA-256."""
+    state = {
+        'max_depth': max_depth,
+        'max_member_size': max_member_size,
+        'max_total_size': max_total_size,
+        'total': 0,
+        'seen': seen if seen is not None else set(),
+    }
+    with open(archive_path, 'rb') as f:
+        yield from _walk_nested(os.path.basename(archive_path), f, 0, state)
+
+def search_nested_archive(archive_path, pattern, ignore_case=True, skip_binary=True, **limits):
+    """Поиск по всем уровням вложенных архивов; повторяющиеся файлы сканируются один раз."""
+    regex = compile_search_pattern(pattern, ignore_case)
+    results = []
+    for entry in walk_nested_archive(archive_path, **limits):
+        if not entry.get('data'):
+            continue
+        for offset, line_no, match in search_in_stream(io.BytesIO(entry['data']), regex, skip_binary=skip_binary):
+            results.append({'member': entry['path'], 'offset': offset, 'line': line_no, 'match': match})
+    return results
+
+def store_archive_members(archive_path, store):
+    """Загрузка файлов архива в контентно-адресуемое хранилище с хешированием в потоке."""
+    results = []
+    for name, f in iter_archive_members(archive_path):
+        results.append({'member': name, **store.put_stream(f, archive_path, name)})
+    return results
+
 if __name__ == "__main__":
     # Тестовые данные (создаем ZIP-архив)
     with zipfile.ZipFile("test_data.zip", 'w') as z:
@@ -112,6 +742,28 @@ if __name__ == "__main__":
     # Демонстрация
     print("Файлы в архиве:", list_archive_files("test_data.zip"))
     print("Поиск 'OSINT':", search_in_archive("test_data.zip", "OSINT"))
+    print("Потоковый поиск 'OSINT':", search_in_archive_stream("test_data.zip", "OSINT"))
     print("Исполняемые файлы:", detect_executable_files("test_data.zip"))
+    print("Параллельное сканирование:", scan_archive_parallel("test_data.zip", "OSINT", workers=2))
     export_archive_data_to_csv("test_data.zip", "archive_metadata.csv")
-    print("Метаданные экспортированы в archive_metadata.csv")
\ No newline at end of file
+    print("Метаданные экспортированы в archive_metadata.csv")
+
+    # Сессия: оглавление читается один раз
+    with ArchiveSession("test_data.zip") as session:
+        print("Файлы (сессия):", session.list_files())
+        print("Исполняемые (сессия):", session.detect_executables())
+        session.extract("file1.txt", "extracted")
+
+    # Вложенный архив: ZIP внутри tar.gz
+    with tarfile.open("nested_data.tar.gz", 'w:gz') as t:
+        t.add("test_data.zip")
+        t.add("test_data.zip", arcname="copy_of_test_data.zip")
+    for entry in walk_nested_archive("nested_data.tar.gz"):
+        print(entry['path'], "(дубликат)" if entry.get('duplicate') else "")
+    print("Поиск во вложенных:", search_nested_archive("nested_data.tar.gz", "OSINT"))
+
+    # Контентно-адресуемое хранилище: повторная загрузка ничего не записывает
+    with ContentStore("content_store") as store:
+        store_archive_members("test_data.zip", store)
+        again = store_archive_members("test_data.zip", store)
+        print("Записано при повторе:", sum(r['stored'] for r in again))
\ No newline at end of file
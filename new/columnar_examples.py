@@ -0,0 +1,90 @@
+"""
+columnar_examples.py
+
+Примеры колоночного кэша для повторных запросов к табличным данным:
+
+Key Features:
+1. Однократная конвертация CSV/Excel/JSON в Parquet рядом с исходным файлом
+2. Ключ кэша — путь, размер и время изменения исходника
+3. Чтение с отображением в память и выборкой только нужных столбцов
+4. Автоматическое удаление устаревших версий кэша
+
+Типичные кейсы:
+- Повторный анализ одной и той же утечки разными запросами
+- Быстрые запросы к большим книгам Excel
+- Подготовка данных для pandas/pyarrow без повторного разбора текста
+"""
+
+import os
+import re
+import tempfile
+import pandas as pd
+
+# Каталог кэша рядом с исходным файлом
+COLUMNAR_CACHE_DIR = '.columnar_cache'
+
+# Имя файла кэша: <исходник><вариант>@<размер>-<mtime>.parquet
+CACHE_NAME_PATTERN = re.compile(r'@\d+-\d+\.parquet$')
+
+def columnar_cache_path(filepath, variant='', cache_dir=None):
+    """Путь к Parquet-кэшу для текущей версии файла (вариант — например, лист Excel)."""
+    path = os.path.abspath(filepath)
+    stat = os.stat(path)
+    directory = cache_dir or os.path.join(os.path.dirname(path), COLUMNAR_CACHE_DIR)
+    name = f"{os.path.basename(path)}{variant}@{stat.st_size}-{stat.st_mtime_ns}.parquet"
+    return os.path.join(directory, name)
+
+def _remove_stale_cache(cache_path):
+    """Удаление кэшей прежних версий того же файла."""
+    directory, name = os.path.split(cache_path)
+    prefix = name[:name.rindex('@') + 1]
+    for other in os.listdir(directory):
+        if other != name and other.startswith(prefix) and CACHE_NAME_PATTERN.search(other[len(prefix) - 1:]):
+            os.remove(os.path.join(directory, other))
+
+def load_columnar(filepath, loader, columns=None, variant='', cache_dir=None):
+    """Чтение таблицы через Parquet-кэш: loader(filepath) вызывается только при первом чтении.
+
+    Повторные чтения отображают Parquet в память и разбирают только columns.
+    Если таблицу нельзя сохранить в Parquet (смешанные типы), кэш не создаётся.
+    """
+    import pyarrow as pa
+
+    cache_path = columnar_cache_path(filepath, variant, cache_dir)
+    if not os.path.exists(cache_path):
+        df = loader(filepath)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # Атомарная запись: параллельные читатели не увидят неполный файл
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+            os.close(fd)
+            try:
+                df.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, cache_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            _remove_stale_cache(cache_path)
+        except (OSError, pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            print(f"Кэш не создан для {filepath}: {e}")
+            return df[columns] if columns is not None else df
+    return pd.read_parquet(cache_path, columns=columns, memory_map=True)
+
+if __name__ == "__main__":
+    import time
+
+    # Демонстрация: первое чтение конвертирует CSV, второе читает Parquet
+    with open("columnar_data.csv", 'w', encoding='utf-8') as f:
+        f.write("name,age,country\n")
+        for i in range(100000):
+            f.write(f"user{i},{20 + i % 50},{('USA', 'UK', 'Canada')[i % 3]}\n")
+
+    start = time.perf_counter()
+    load_columnar("columnar_data.csv", pd.read_csv)
+    print(f"Первое чтение (конвертация): {time.perf_counter() - start:.3f} с")
+
+    start = time.perf_counter()
+    countries = load_columnar("columnar_data.csv", pd.read_csv, columns=["country"])
+    print(f"Повторное чтение одного столбца: {time.perf_counter() - start:.3f} с")
+    print("Частоты стран:", countries["country"].value_counts().to_dict())
+    print("Файл кэша:", columnar_cache_path("columnar_data.csv"))
@@ -5,9 +5,15 @@ csv_examples.py
 - Чтение, запись, фильтрация.
 - Конвертация в JSON, Excel.
 - Анализ данных (уникальные значения, объединение файлов).
+- Потоковая обработка больших файлов по частям: фильтрация, частоты, JSON Lines.
+- Колоночный кэш (Parquet) для повторных запросов к одному файлу.
 """
 
 import pandas as pd
+from columnar_examples import load_columnar
+
+# Число строк в одной части при потоковом чтении
+CSV_CHUNK_SIZE = 100000
 
 # Тестовые данные
 TEST_CSV_DATA = "name,age,country\nAlice,30,USA\nBob,25,UK\nCharlie,35,Canada"
@@ -16,29 +22,134 @@ def read_csv(filepath, delimiter=','):
     """Чтение CSV/TSV-файла."""
     return pd.read_csv(filepath, delimiter=delimiter)
 
+def read_csv_cached(filepath, columns=None, delimiter=','):
+    """Чтение CSV через Parquet-кэш с выборкой столбцов."""
+    variant = '' if delimiter == ',' else f"#sep{ord(delimiter)}"
+    return load_columnar(filepath, lambda path: read_csv(path, delimiter), columns, variant)
+
 def write_csv(data, filepath, delimiter=','):
     """Запись данных в CSV/TSV."""
     data.to_csv(filepath, sep=delimiter, index=False)
 
-def filter_csv_by_column(filepath, column, value):
+def filter_csv_by_column(filepath, column, value, cache=False):
     """Фильтрация CSV по значению столбца."""
-    df = read_csv(filepath)
+    df = read_csv_cached(filepath) if cache else read_csv(filepath)
     return df[df[column] == value]
 
-def csv_to_json(csv_filepath, json_filepath):
+def csv_to_json(csv_filepath, json_filepath, cache=False):
     """Конвертация CSV в JSON."""
-    df = read_csv(csv_filepath)
+    df = read_csv_cached(csv_filepath) if cache else read_csv(csv_filepath)
     df.to_json(json_filepath, orient='records', indent=4)
 
-def analyze_csv_column(filepath, column):
+def analyze_csv_column(filepath, column, cache=False):
     """Анализ столбца (например, уникальные значения)."""
-    df = read_csv(filepath)
+    df = read_csv_cached(filepath, columns=[column]) if cache else read_csv(filepath)
     return df[column].value_counts()
 
+def iter_csv_chunks(filepath, usecols=None, dtype=None, chunksize=CSV_CHUNK_SIZE, delimiter=','):
+    """Потоковое чтение CSV частями: разбираются только нужные столбцы с заданными типами."""
+    yield from pd.read_csv(filepath, delimiter=delimiter, usecols=usecols, dtype=dtype, chunksize=chunksize)
+
+def _filter_mask(chunk, filters):
+    """Маска строк, удовлетворяющих всем условиям {столбец: значение или список значений}."""
+    mask = pd.Series(True, index=chunk.index)
+    for column, value in filters.items():
+        if isinstance(value, (list, tuple, set, frozenset)):
+            mask &= chunk[column].isin(value)
+        else:
+            mask &= chunk[column] == value
+    return mask
+
+def _as_string_filter(value):
+    """Значение условия в строковом виде для столбцов с типом 'string'."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [str(v) for v in value]
+    return str(value)
+
+def process_csv_stream(filepath, filters=None, count_columns=(), jsonl_filepath=None, collect=False,
+                       columns=None, dtype=None, chunksize=CSV_CHUNK_SIZE, delimiter=','):
+    """Фильтрация, подсчёт частот и экспорт в JSON Lines за один проход с ограниченной памятью.
+
+    filters — условия отбора строк; count_columns — столбцы для подсчёта частот
+    (по отобранным строкам); columns — столбцы для экспорта и collect.
+    Если экспорт не нужен, читаются только столбцы из условий и подсчётов.
+    Столбцы условий и подсчётов без явного типа в dtype читаются как 'string',
+    а значения условий сравниваются в строковом виде.
+    """
+    filters = filters or {}
+    if dtype is None or isinstance(dtype, dict):
+        # Иначе тип выводится по каждой части отдельно и 10000 и '10000' считаются разными значениями
+        dtype = dict(dtype or {})
+        for column in list(filters) + list(count_columns):
+            if column not in dtype:
+                dtype[column] = 'string'
+                if column in filters:
+                    filters = {**filters, column: _as_string_filter(filters[column])}
+    if columns is None and (jsonl_filepath or collect):
+        usecols = None
+    else:
+        needed = list(filters) + list(count_columns) + list(columns or [])
+        usecols = list(dict.fromkeys(needed))
+
+    counts = {column: None for column in count_columns}
+    matches = []
+    rows = matched = 0
+    out = open(jsonl_filepath, 'w', encoding='utf-8') if jsonl_filepath else None
+    try:
+        for chunk in iter_csv_chunks(filepath, usecols, dtype, chunksize, delimiter):
+            rows += len(chunk)
+            if filters:
+                chunk = chunk[_filter_mask(chunk, filters)]
+            matched += len(chunk)
+            for column in count_columns:
+                vc = chunk[column].value_counts()
+                counts[column] = vc if counts[column] is None else counts[column].add(vc, fill_value=0)
+            selected = chunk[columns] if columns else chunk
+            if out and len(selected):
+                text = selected.to_json(orient='records', lines=True, force_ascii=False)
+                out.write(text if text.endswith('\n') else text + '\n')
+            if collect:
+                matches.append(selected)
+    finally:
+        if out:
+            out.close()
+
+    for column, total in counts.items():
+        total = total if total is not None else pd.Series(dtype='int64')
+        total = total.astype('int64').sort_values(ascending=False)
+        total.index.name = column
+        counts[column] = total.rename('count')
+    result = {'rows': rows, 'matched': matched, 'value_counts': counts}
+    if collect:
+        result['matches'] = pd.concat(matches, ignore_index=True) if matches else pd.DataFrame()
+    return result
+
+def filter_csv_stream(filepath, column, value, dtype=None, chunksize=CSV_CHUNK_SIZE):
+    """Потоковая фильтрация большого CSV по значению столбца."""
+    return process_csv_stream(filepath, {column: value}, collect=True, dtype=dtype, chunksize=chunksize)['matches']
+
+def analyze_csv_column_stream(filepath, column, dtype=None, chunksize=CSV_CHUNK_SIZE):
+    """Частоты значений столбца большого CSV (читается только этот столбец)."""
+    return process_csv_stream(filepath, count_columns=[column], dtype=dtype, chunksize=chunksize)['value_counts'][column]
+
+def csv_to_jsonl(csv_filepath, jsonl_filepath, columns=None, dtype=None, chunksize=CSV_CHUNK_SIZE):
+    """Потоковая конвертация CSV в JSON Lines."""
+    return process_csv_stream(csv_filepath, jsonl_filepath=jsonl_filepath, columns=columns,
+                              dtype=dtype, chunksize=chunksize)
+
 if __name__ == "__main__":
     # Примеры использования
     with open("test_data.csv", 'w', encoding='utf-8') as f:
         f.write(TEST_CSV_DATA)
     print("Фильтрация по стране (USA):", filter_csv_by_column("test_data.csv", "country", "USA"))
     print("Анализ возраста:", analyze_csv_column("test_data.csv", "age"))
-    csv_to_json("test_data.csv", "test_data.json")
\ No newline at end of file
+    csv_to_json("test_data.csv", "test_data.json")
+
+    # Потоковая обработка: фильтр, частоты и JSON Lines за один проход
+    result = process_csv_stream("test_data.csv", filters={"country": ["USA", "UK"]}, count_columns=["country"],
+                                jsonl_filepath="test_data.jsonl", dtype={"name": "string", "age": "int32", "country": "string"})
+    print("Отобрано строк:", result['matched'], "из", result['rows'])
+    print("Частоты стран:", result['value_counts']['country'].to_dict())
+
+    # Колоночный кэш: первый вызов создаёт Parquet, следующие читают только нужный столбец
+    print("Анализ возраста (кэш):", analyze_csv_column("test_data.csv", "age", cache=True).to_dict())
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+dedup_examples.py
+
+Примеры контентно-адресуемого хранилища для OSINT:
+
+Key Features:
+1. Хранение файлов по SHA-256 (одинаковое содержимое — одна копия)
+2. Хеширование во время записи, без повторного чтения файла
+3. Пропуск уже сохранённого содержимого
+4. Индекс SQLite: хеш -> источники (архив, письмо, имя файла)
+
+Типичные кейсы:
+- Повторный разбор пересекающихся дампов утечек
+- Дедупликация вложений из почтовых архивов
+- Поиск всех источников, где встречался один и тот же файл
+"""
+
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+
+# Размер порции при потоковом хешировании
+STORE_CHUNK_SIZE = 1024 * 1024
+
+# Данные меньше этого порога держим в памяти до вычисления хеша
+STORE_SPOOL_SIZE = 8 * 1024 * 1024
+
+def _disk_file_position(f):
+    """Позиция обычного файла на диске (повторное чтение дешёвое), иначе None.
+
+    Члены ZIP и tar тоже умеют перематываться, но перемотка назад
+    заново распаковывает данные, поэтому для них возвращается None.
+    """
+    if type(f) not in (io.BufferedReader, io.FileIO):
+        return None
+    try:
+        if f.seekable():
+            return f.tell()
+    except (OSError, ValueError):
+        pass
+    return None
+
+class ContentStore:
+    """Контентно-адресуемое хранилище с индексом SQLite."""
+
+    def __init__(self, store_dir, commit_every=1000):
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, 'objects')
+        self.tmp_dir = os.path.join(store_dir, 'tmp')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(store_dir, 'index.db'))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (sha256 TEXT PRIMARY KEY, size INTEGER);
+            CREATE TABLE IF NOT EXISTS sources (
+                sha256 TEXT, source TEXT, name TEXT,
+                UNIQUE (sha256, source, name)
+            );
+            CREATE INDEX IF NOT EXISTS idx_sources_sha256 ON sources (sha256);
+        """)
+        self.commit_every = commit_every
+        self._pending = 0
+
+    def object_path(self, sha256):
+        """Путь к объекту по хешу (objects/ab/abcdef...)."""
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def contains(self, sha256):
+        """Проверка наличия содержимого в хранилище."""
+        return self.conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone() is not None
+
+    def put_bytes(self, data, source, name):
+        """Сохранение данных из памяти: запись только если хеш ещё не встречался."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        stored = not self.contains(sha256)
+        if stored:
+            self._write_object(sha256, data=data)
+        return self._register(sha256, len(data), source, name, stored)
+
+    def put_stream(self, f, source, name, chunk_size=STORE_CHUNK_SIZE):
+        """Сохранение потока: хеширование во время чтения, повторы не записываются.
+
+        Обычный файл на диске сначала только хешируется, а копируется
+        лишь при отсутствии хеша в хранилище. Остальные потоки (члены
+        ZIP и tar) читаются один раз: небольшие данные накапливаются
+        в памяти, крупные пишутся во временный файл, который удаляется,
+        если такое содержимое уже есть.
+        """
+        start = _disk_file_position(f)
+        if start is not None:
+            return self._put_disk_file(f, start, source, name, chunk_size)
+
+        h = hashlib.sha256()
+        size = 0
+        buffer = []
+        tmp = None
+        try:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                h.update(chunk)
+                size += len(chunk)
+                if tmp is None:
+                    buffer.append(chunk)
+                    if size > STORE_SPOOL_SIZE:
+                        tmp = tempfile.NamedTemporaryFile(dir=self.tmp_dir, delete=False)
+                        tmp.writelines(buffer)
+                        buffer = []
+                else:
+                    tmp.write(chunk)
+
+            sha256 = h.hexdigest()
+            stored = not self.contains(sha256)
+            if tmp is not None:
+                tmp.close()
+                if stored:
+                    self._write_object(sha256, tmp_path=tmp.name)
+                    tmp = None
+            elif stored:
+                self._write_object(sha256, data=b''.join(buffer))
+            return self._register(sha256, size, source, name, stored)
+        finally:
+            if tmp is not None:
+                tmp.close()
+                os.remove(tmp.name)
+
+    def _put_disk_file(self, f, start, source, name, chunk_size):
+        """Два прохода по файлу на диске: хеш, затем копирование только новых данных."""
+        h = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+            size += len(chunk)
+        sha256 = h.hexdigest()
+        stored = not self.contains(sha256)
+        if stored:
+            f.seek(start)
+            self._write_object(sha256, src=f, chunk_size=chunk_size)
+        return self._register(sha256, size, source, name, stored)
+
+    def put_file(self, filepath, source=None):
+        """Сохранение файла с диска."""
+        with open(filepath, 'rb') as f:
+            return self.put_stream(f, source or filepath, os.path.basename(filepath))
+
+    def sources(self, sha256):
+        """Все источники, в которых встречалось содержимое."""
+        return self.conn.execute(
+            "SELECT source, name FROM sources WHERE sha256 = ? ORDER BY source, name", (sha256,)).fetchall()
+
+    def _write_object(self, sha256, data=None, tmp_path=None, src=None, chunk_size=STORE_CHUNK_SIZE):
+        """Атомарная запись объекта в хранилище (из памяти, временного файла или потока)."""
+        path = self.object_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if tmp_path is None:
+            with tempfile.NamedTemporaryFile(dir=self.tmp_dir, delete=False) as tmp:
+                if src is None:
+                    tmp.write(data)
+                else:
+                    # Повторное чтение проверяется по хешу: источник мог измениться
+                    h = hashlib.sha256()
+                    for chunk in iter(lambda: src.read(chunk_size), b''):
+                        h.update(chunk)
+                        tmp.write(chunk)
+            tmp_path = tmp.name
+            if src is not None and h.hexdigest() != sha256:
+                os.remove(tmp_path)
+                raise ValueError("Содержимое потока изменилось между хешированием и записью")
+        os.replace(tmp_path, path)
+
+    def _register(self, sha256, size, source, name, stored):
+        """Запись хеша и источника в индекс."""
+        if stored:
+            self.conn.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (sha256, size))
+        self.conn.execute("INSERT OR IGNORE INTO sources VALUES (?, ?, ?)", (sha256, source, name))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.conn.commit()
+            self._pending = 0
+        return {'sha256': sha256, 'size': size, 'path': self.object_path(sha256), 'stored': stored}
+
+    def close(self):
+        """Сохранение индекса и закрытие соединения."""
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    # Демонстрация: одинаковое содержимое сохраняется один раз
+    with open("dedup_a.txt", 'w') as f:
+        f.write("OSINT leak sample")
+    with open("dedup_b.txt", 'w') as f:
+        f.write("OSINT leak sample")
+
+    with ContentStore("content_store") as store:
+        first = store.put_file("dedup_a.txt")
+        second = store.put_file("dedup_b.txt")
+        print("Первый файл записан:", first['stored'])
+        print("Второй файл записан:", second['stored'])
+        print("Источники:", store.sources(first['sha256']))
\ No newline at end of file
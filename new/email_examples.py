@@ -9,6 +9,11 @@ Key Features:
 3. Проверка репутации отправителя через API
 4. Анализ временных меток
 5. Выявление аномалий в заголовках
+6. Дедупликация вложений через контентно-адресуемое хранилище
+7. Массовая загрузка mbox/Maildir в SQLite/Parquet
+8. Быстрая сортировка писем только по заголовкам
+9. Пакетная проверка репутации отправителей (кэш, пул, лимит частоты)
+10. Потоковое извлечение вложений с ограниченным расходом памяти
 
 Типичные кейсы:
 - Исследование фишинговых писем
@@ -17,18 +22,68 @@ Key Features:
 - Анализ подозрительных вложений
 """
 
+import binascii
 import email
 from email.header import decode_header
+from email.parser import BytesHeaderParser
+import glob
+import json
+import mailbox
 import os
+import random
+import re
+import sqlite3
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 import hashlib
+from dedup_examples import ContentStore
+
+HUNTER_API_URL = "https://api.hunter.io/v2/email-verifier"
+
+# Предел размера блока заголовков при быстрой сортировке писем
+HEADER_MAX_SIZE = 256 * 1024
+
+# Предел длины строки при потоковом чтении тела письма
+MIME_LINE_LIMIT = 64 * 1024
+
+# Объём закодированных строк, декодируемых за один вызов
+MIME_DECODE_BATCH = 1024 * 1024
+
+# Символы, не входящие в алфавит base64
+BASE64_JUNK = re.compile(rb'[^A-Za-z0-9+/=]')
+
+# Поля записи о письме при массовой загрузке
+MESSAGE_FIELDS = ('source', 'message_id', 'from_addr', 'to_addr', 'subject', 'date',
+                  'return_path', 'attachments', 'size', 'suspicious', 'error')
 
 def parse_eml(filepath):
     """Загрузка и парсинг EML-файла."""
     with open(filepath, 'rb') as f:
         return email.message_from_binary_file(f)
 
+def read_header_block(f, max_size=HEADER_MAX_SIZE):
+    """Чтение только блока заголовков (до первой пустой строки)."""
+    lines = []
+    size = 0
+    for line in f:
+        if line in (b'\r\n', b'\n'):
+            break
+        lines.append(line)
+        size += len(line)
+        if size > max_size:
+            break
+    return b''.join(lines)
+
+def parse_eml_headers(filepath):
+    """Разбор только заголовков EML без чтения тела и вложений."""
+    with open(filepath, 'rb') as f:
+        return BytesHeaderParser().parsebytes(read_header_block(f))
+
 def extract_headers(eml):
     """Извлечение и декодирование заголовков."""
     headers = {}
@@ -51,25 +106,171 @@ def save_attachments(eml, output_dir):
             filename = part.get_filename()
             if filename:
                 file_path = f"{output_dir}/{filename}"
+                content = part.get_payload(decode=True)
                 with open(file_path, 'wb') as f:
-                    f.write(part.get_payload(decode=True))
+                    f.write(content)
                 
-                # Хеширование файла для анализа
-                with open(file_path, 'rb') as f:
-                    content = f.read()
-                    sha256 = hashlib.sha256(content).hexdigest()
-                    attachments.append({"filename": filename, "sha256": sha256})
+                # Хеширование содержимого для анализа (без повторного чтения файла)
+                sha256 = hashlib.sha256(content).hexdigest()
+                attachments.append({"filename": filename, "sha256": sha256})
+    return attachments
+
+def save_attachments_to_store(eml, store, source):
+    """Сохранение вложений в контентно-адресуемое хранилище (повторы не записываются)."""
+    attachments = []
+    for part in eml.walk():
+        if part.get_content_disposition() == 'attachment':
+            filename = part.get_filename()
+            if filename:
+                result = store.put_bytes(part.get_payload(decode=True) or b'', source, filename)
+                attachments.append({"filename": filename, **result})
+    return attachments
+
+def _iter_part_body(f, boundaries, end):
+    """Строки тела части до ближайшей границы (в end[0] — строка-граница или None)."""
+    previous = None
+    at_line_start = True
+    while True:
+        line = f.readline(MIME_LINE_LIMIT)
+        if not line:
+            end[0] = None
+            break
+        if at_line_start and line.startswith(b'--') and any(line.startswith(b) for b in boundaries):
+            end[0] = line
+            # Перевод строки перед границей относится к границе, а не к телу
+            if previous is not None:
+                yield previous.rstrip(b'\r\n') if previous.endswith(b'\n') else previous
+            return
+        if previous is not None:
+            yield previous
+        previous = line
+        at_line_start = line.endswith(b'\n')
+    if previous is not None:
+        yield previous
+
+def _iter_line_batches(lines, batch_size=MIME_DECODE_BATCH):
+    """Объединение строк в блоки примерно по batch_size байт."""
+    batch = []
+    size = 0
+    for line in lines:
+        batch.append(line)
+        size += len(line)
+        if size >= batch_size:
+            yield b''.join(batch)
+            batch = []
+            size = 0
+    if batch:
+        yield b''.join(batch)
+
+def _a2b_base64_lenient(data):
+    """Декодирование base64 без исключений: битые четвёрки символов пропускаются."""
+    try:
+        return binascii.a2b_base64(data)
+    except binascii.Error:
+        decoded = bytearray()
+        for i in range(0, len(data), 4):
+            try:
+                decoded += binascii.a2b_base64(data[i:i + 4])
+            except binascii.Error:
+                pass
+        return bytes(decoded)
+
+def _decode_body(lines, encoding):
+    """Инкрементальное декодирование тела (base64/quoted-printable) блоками из целых строк."""
+    if encoding == 'base64':
+        rest = b''
+        for block in _iter_line_batches(lines):
+            data = rest + BASE64_JUNK.sub(b'', block)
+            cut = len(data) - len(data) % 4
+            rest = data[cut:]
+            if cut:
+                yield _a2b_base64_lenient(data[:cut])
+        tail = rest.rstrip(b'=')
+        # Один лишний символ не кодирует ни одного байта — отбрасываем
+        if len(tail) % 4 == 1:
+            tail = tail[:-1]
+        if tail:
+            yield _a2b_base64_lenient(tail + b'=' * (-len(tail) % 4))
+    elif encoding == 'quoted-printable':
+        for block in _iter_line_batches(lines):
+            yield binascii.a2b_qp(block)
+    else:
+        yield from _iter_line_batches(lines)
+
+def _boundary_marker(line):
+    """Граница без перевода строки и пробелов в конце."""
+    return line.rstrip() if line is not None else None
+
+def _stream_mime_part(f, headers, boundaries, output_dir, attachments):
+    """Обработка части письма из потока; возвращает строку-границу, на которой она закончилась."""
+    end = [None]
+    boundary = headers.get_boundary() if headers.get_content_maintype() == 'multipart' else None
+    if boundary:
+        marker = b'--' + boundary.encode('ascii', 'replace')
+        boundaries.append(marker)
+        # Преамбула до первой границы
+        for _ in _iter_part_body(f, boundaries, end):
+            pass
+        line = end[0]
+        while _boundary_marker(line) == marker:
+            part_headers = BytesHeaderParser().parsebytes(read_header_block(f))
+            line = _stream_mime_part(f, part_headers, boundaries, output_dir, attachments)
+        boundaries.pop()
+        if _boundary_marker(line) == marker + b'--':
+            # Эпилог до границы внешней части
+            for _ in _iter_part_body(f, boundaries, end):
+                pass
+            line = end[0]
+        return line
+
+    if headers.get_content_type() == 'message/rfc822':
+        # Вложенное письмо разбирается так же, как и внешнее
+        nested = BytesHeaderParser().parsebytes(read_header_block(f))
+        return _stream_mime_part(f, nested, boundaries, output_dir, attachments)
+
+    body = _iter_part_body(f, boundaries, end)
+    filename = headers.get_filename()
+    if headers.get_content_disposition() == 'attachment' and filename:
+        filename = os.path.basename(filename)
+        encoding = str(headers.get('Content-Transfer-Encoding', '')).strip().lower()
+        h = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(output_dir, f".{filename}.part")
+        try:
+            with open(tmp_path, 'wb') as out:
+                for chunk in _decode_body(body, encoding):
+                    h.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+            os.replace(tmp_path, os.path.join(output_dir, filename))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        attachments.append({"filename": filename, "sha256": h.hexdigest(), "size": size})
+    else:
+        for _ in body:
+            pass
+    return end[0]
+
+def extract_attachments_stream(filepath, output_dir):
+    """Потоковое извлечение вложений: декодирование и хеширование без загрузки письма в память."""
+    os.makedirs(output_dir, exist_ok=True)
+    attachments = []
+    with open(filepath, 'rb') as f:
+        headers = BytesHeaderParser().parsebytes(read_header_block(f))
+        _stream_mime_part(f, headers, [], output_dir, attachments)
     return attachments
 
-def check_sender_reputation(email_address, api_key):
+def check_sender_reputation(email_address, api_key, session=None, timeout=10, api_url=HUNTER_API_URL):
     """Проверка репутации отправителя через API (например, Hunter.io)."""
-    url = f"https://api.hunter.io/v2/email-verifier?email={email_address}&api_key={api_key}"
-    response = requests.get(url)
+    http = session or requests
+    response = http.get(api_url, params={'email': email_address, 'api_key': api_key}, timeout=timeout)
     return response.json() if response.status_code == 200 else None
 
-def analyze_timestamps(eml):
-    """Анализ временных меток письма."""
-    headers = extract_headers(eml)
+def analyze_timestamps(eml, headers=None):
+    """Анализ временных меток письма (headers — уже декодированные заголовки)."""
+    if headers is None:
+        headers = extract_headers(eml)
     timestamps = {}
     for key in ['Date', 'Received']:
         if key in headers:
@@ -79,9 +280,10 @@ def analyze_timestamps(eml):
                 timestamps[key] = headers[key]
     return timestamps
 
-def detect_suspicious_headers(eml):
+def detect_suspicious_headers(eml, headers=None):
     """Выявление подозрительных заголовков (например, подделка From)."""
-    headers = extract_headers(eml)
+    if headers is None:
+        headers = extract_headers(eml)
     suspicious = []
     
     # Проверка несоответствия From и Return-Path
@@ -91,6 +293,249 @@ def detect_suspicious_headers(eml):
     
     return suspicious
 
+def iter_mail_sources(path):
+    """Потоковый обход писем: mbox-файл, каталог Maildir или каталог с .eml — (источник, байты)."""
+    if os.path.isdir(os.path.join(path, 'cur')):
+        box = mailbox.Maildir(path, factory=None, create=False)
+        for key in sorted(box.iterkeys()):
+            yield f"{path}:{key}", box.get_bytes(key)
+    elif os.path.isdir(path):
+        for filepath in sorted(glob.glob(os.path.join(path, '**', '*.eml'), recursive=True)):
+            with open(filepath, 'rb') as f:
+                yield filepath, f.read()
+    else:
+        box = mailbox.mbox(path, create=False)
+        try:
+            for key in box.iterkeys():
+                yield f"{path}:{key}", box.get_bytes(key)
+        finally:
+            box.close()
+
+def message_record(source, raw):
+    """Структурированная запись о письме; заголовки декодируются один раз."""
+    record = dict.fromkeys(MESSAGE_FIELDS)
+    record.update(source=source, size=len(raw))
+    try:
+        eml = email.message_from_bytes(raw)
+        headers = extract_headers(eml)
+        timestamps = analyze_timestamps(eml, headers)
+        date = timestamps.get('Date')
+        record.update(
+            message_id=headers.get('Message-ID'),
+            from_addr=headers.get('From'),
+            to_addr=headers.get('To'),
+            subject=headers.get('Subject'),
+            date=date.isoformat() if isinstance(date, datetime) else date,
+            return_path=headers.get('Return-Path'),
+            attachments=sum(1 for part in eml.walk() if part.get_content_disposition() == 'attachment'),
+            suspicious='; '.join(detect_suspicious_headers(eml, headers)),
+        )
+    except Exception as e:
+        record['error'] = str(e)
+    return record
+
+def _parse_message_batch(batch):
+    """Разбор пачки писем в процессе пула."""
+    return [message_record(source, raw) for source, raw in batch]
+
+def _open_message_sink(output_file, output_format):
+    """Приёмник записей: функция записи пачки и функция закрытия."""
+    if output_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = pa.schema([(name, pa.int64() if name in ('attachments', 'size') else pa.string())
+                            for name in MESSAGE_FIELDS])
+        writer = pq.ParquetWriter(output_file, schema)
+        write = lambda records: writer.write_table(pa.Table.from_pylist(records, schema=schema))
+        return write, writer.close
+
+    conn = sqlite3.connect(output_file)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS messages ({', '.join(MESSAGE_FIELDS)})")
+    insert = f"INSERT INTO messages VALUES ({', '.join('?' * len(MESSAGE_FIELDS))})"
+    write = lambda records: conn.executemany(insert, [tuple(r[k] for k in MESSAGE_FIELDS) for r in records])
+
+    def close():
+        conn.commit()
+        conn.close()
+    return write, close
+
+def ingest_mailbox(path, output_file, output_format='sqlite', workers=None, batch_size=500, progress=True):
+    """Массовая загрузка mbox/Maildir/EML в SQLite или Parquet с разбором в пуле процессов."""
+    workers = workers or os.cpu_count() or 1
+    write, close = _open_message_sink(output_file, output_format)
+    start = time.perf_counter()
+    total = errors = 0
+    pending = deque()
+
+    def drain(max_pending):
+        nonlocal total, errors
+        while len(pending) > max_pending:
+            records = pending.popleft().result()
+            write(records)
+            total += len(records)
+            errors += sum(1 for r in records if r['error'])
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(f"Обработано писем: {total} ({total / elapsed:.0f} писем/с)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch = []
+            for item in iter_mail_sources(path):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    pending.append(pool.submit(_parse_message_batch, batch))
+                    batch = []
+                    # Ограничиваем число пачек в работе, чтобы память не росла
+                    drain(2 * workers)
+            if batch:
+                pending.append(pool.submit(_parse_message_batch, batch))
+            drain(0)
+    finally:
+        close()
+
+    elapsed = time.perf_counter() - start
+    return {'messages': total, 'errors': errors, 'seconds': elapsed,
+            'messages_per_sec': total / elapsed if elapsed else float('inf')}
+
+def triage_emails(filepaths, is_interesting=None):
+    """Быстрая сортировка писем по заголовкам; полный разбор — только для отмеченных.
+
+    is_interesting(headers, suspicious) решает, нужен ли полный разбор;
+    по умолчанию отмечаются письма с подозрительными заголовками.
+    """
+    if is_interesting is None:
+        is_interesting = lambda headers, suspicious: bool(suspicious)
+    results = []
+    for filepath in filepaths:
+        eml = parse_eml_headers(filepath)
+        headers = extract_headers(eml)
+        suspicious = detect_suspicious_headers(eml, headers)
+        result = {
+            'file': filepath,
+            'headers': headers,
+            'timestamps': analyze_timestamps(eml, headers),
+            'suspicious': suspicious,
+            'message': None,
+        }
+        if is_interesting(headers, suspicious):
+            result['message'] = parse_eml(filepath)
+        results.append(result)
+    return results
+
+class TokenBucket:
+    """Ограничитель частоты запросов (token bucket), безопасный для потоков."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Ожидание свободного токена."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class ReputationCache:
+    """Дисковый кэш результатов проверки с временем жизни (TTL)."""
+
+    def __init__(self, path, ttl=86400):
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS reputation (address TEXT PRIMARY KEY, result TEXT, fetched_at REAL)")
+
+    def get(self, address):
+        """Результат из кэша или None, если его нет или он устарел."""
+        row = self.conn.execute("SELECT result, fetched_at FROM reputation WHERE address = ?", (address,)).fetchone()
+        if row and time.time() - row[1] < self.ttl:
+            return json.loads(row[0])
+        return None
+
+    def set(self, address, result):
+        """Сохранение результата в кэш."""
+        self.conn.execute("INSERT OR REPLACE INTO reputation VALUES (?, ?, ?)",
+                          (address, json.dumps(result), time.time()))
+
+    def close(self):
+        """Сохранение и закрытие кэша."""
+        self.conn.commit()
+        self.conn.close()
+
+def _reputation_with_retry(address, api_key, session, bucket, timeout, retries, backoff, api_url):
+    """Запрос репутации с ограничением частоты и повтором с экспоненциальной задержкой."""
+    for attempt in range(retries + 1):
+        bucket.acquire()
+        try:
+            response = session.get(api_url, params={'email': address, 'api_key': api_key}, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.ContentDecodingError):
+            response = None
+        except requests.RequestException:
+            # Бесконечные перенаправления, неверный URL: повтор не поможет
+            return None
+        if response is not None:
+            if response.status_code == 200:
+                try:
+                    return response.json()
+                except ValueError:
+                    # Обрезанный ответ или HTML-страница прокси вместо JSON — повторяем
+                    pass
+            elif response.status_code != 429 and response.status_code < 500:
+                return None
+        if attempt < retries:
+            delay = backoff * 2 ** attempt + random.uniform(0, backoff)
+            retry_after = response.headers.get('Retry-After') if response is not None else None
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            time.sleep(delay)
+    return None
+
+def check_senders_reputation(addresses, api_key, cache_path='reputation_cache.db', ttl=86400, workers=8,
+                             rate=5, retries=3, backoff=0.5, timeout=10, api_url=HUNTER_API_URL):
+    """Пакетная проверка отправителей: дедупликация, кэш на диске, пул соединений, лимит частоты."""
+    unique = sorted({address.strip().lower() for address in addresses if address})
+    cache = ReputationCache(cache_path, ttl)
+    results = {}
+    missing = []
+    for address in unique:
+        cached = cache.get(address)
+        if cached is not None:
+            results[address] = cached
+        else:
+            missing.append(address)
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    bucket = TokenBucket(rate)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                address: pool.submit(_reputation_with_retry, address, api_key, session, bucket,
+                                     timeout, retries, backoff, api_url)
+                for address in missing
+            }
+            for address, future in futures.items():
+                result = future.result()
+                results[address] = result
+                if result is not None:
+                    cache.set(address, result)
+    finally:
+        session.close()
+        cache.close()
+    return results
+
 if __name__ == "__main__":
     # Тестовые данные
     TEST_EML = """From: sender@example.com
@@ -118,5 +563,18 @@ Test attachment content.
     eml = parse_eml("test_email.eml")
     print("Заголовки:", extract_headers(eml))
     print("Вложения:", save_attachments(eml, "attachments"))
+    print("Вложения (потоково):", extract_attachments_stream("test_email.eml", "attachments_stream"))
+    with ContentStore("content_store") as store:
+        print("Вложения в хранилище:", save_attachments_to_store(eml, store, "test_email.eml"))
     print("Временные метки:", analyze_timestamps(eml))
-    print("Подозрительные заголовки:", detect_suspicious_headers(eml))
\ No newline at end of file
+    print("Подозрительные заголовки:", detect_suspicious_headers(eml))
+
+    # Массовая загрузка: каталог с одним .eml -> SQLite
+    os.makedirs("mail_dump", exist_ok=True)
+    with open("mail_dump/test_email.eml", 'w') as f:
+        f.write(TEST_EML)
+    print("Загрузка:", ingest_mailbox("mail_dump", "mail_dump.db", workers=2))
+
+    # Сортировка по заголовкам: тело читается только у отмеченных писем
+    for item in triage_emails(["test_email.eml"], lambda headers, suspicious: 'Test' in headers.get('Subject', '')):
+        print("Сортировка:", item['file'], item['suspicious'], "полный разбор" if item['message'] else "только заголовки")
\ No newline at end of file
@@ -5,9 +5,11 @@ excel_examples.py
 - Чтение, запись, фильтрация.
 - Конвертация в CSV, JSON.
 - Анализ данных (статистика по столбцам).
+- Колоночный кэш (Parquet) вместо повторного разбора книги.
 """
 
 import pandas as pd
+from columnar_examples import load_columnar
 
 # Тестовые данные
 TEST_EXCEL_DATA = {"name": ["Alice", "Bob", "Charlie"], "age": [30, 25, 35], "country": ["USA", "UK", "Canada"]}
@@ -16,18 +18,22 @@ def read_excel(filepath, sheet_name=0):
     """Чтение Excel-файла."""
     return pd.read_excel(filepath, sheet_name=sheet_name)
 
+def read_excel_cached(filepath, sheet_name=0, columns=None):
+    """Чтение листа Excel через Parquet-кэш с выборкой столбцов."""
+    return load_columnar(filepath, lambda path: read_excel(path, sheet_name), columns, f"#sheet-{sheet_name}")
+
 def write_excel(data, filepath, sheet_name='Sheet1'):
     """Запись данных в Excel."""
     data.to_excel(filepath, sheet_name=sheet_name, index=False)
 
-def excel_to_csv(excel_filepath, csv_filepath, sheet_name=0):
+def excel_to_csv(excel_filepath, csv_filepath, sheet_name=0, cache=False):
     """Конвертация Excel в CSV."""
-    df = read_excel(excel_filepath, sheet_name)
+    df = read_excel_cached(excel_filepath, sheet_name) if cache else read_excel(excel_filepath, sheet_name)
     df.to_csv(csv_filepath, index=False)
 
-def analyze_excel_column(filepath, column, sheet_name=0):
+def analyze_excel_column(filepath, column, sheet_name=0, cache=False):
     """Анализ столбца (например, среднее значение)."""
-    df = read_excel(filepath, sheet_name)
+    df = read_excel_cached(filepath, sheet_name, [column]) if cache else read_excel(filepath, sheet_name)
     return df[column].describe()
 
 if __name__ == "__main__":
@@ -35,4 +41,7 @@ if __name__ == "__main__":
     df = pd.DataFrame(TEST_EXCEL_DATA)
     write_excel(df, "test_data.xlsx")
     print("Анализ возраста:", analyze_excel_column("test_data.xlsx", "age"))
-    excel_to_csv("test_data.xlsx", "test_data.csv")
\ No newline at end of file
+    excel_to_csv("test_data.xlsx", "test_data.csv")
+
+    # Колоночный кэш: книга разбирается один раз, затем читается только нужный столбец
+    print("Анализ возраста (кэш):", analyze_excel_column("test_data.xlsx", "age", cache=True).to_dict())
\ No newline at end of file
@@ -5,11 +5,14 @@ json_examples.py
 - Чтение, запись, фильтрация.
 - Конвертация в другие форматы (CSV, Excel).
 - Анализ данных (частотность значений).
+- Колоночный кэш (Parquet) для повторных запросов.
 """
 
+import hashlib
 import json
 import pandas as pd
 from collections import Counter
+from columnar_examples import load_columnar
 
 # Тестовые данные
 TEST_JSON_DATA = [
@@ -37,20 +40,37 @@ def json_to_dataframe(filepath):
     """Конвертация JSON в DataFrame."""
     return pd.read_json(filepath)
 
-def analyze_json_values(filepath, key):
+def json_to_dataframe_cached(filepath, columns=None):
+    """Конвертация JSON в DataFrame через Parquet-кэш с выборкой столбцов."""
+    return load_columnar(filepath, json_to_dataframe, columns)
+
+def _json_key_values(filepath, key):
+    """Значения ключа в виде JSON-текста: в кэше 30 не станет 30.0, а null не потеряется."""
+    data = read_json(filepath)
+    values = [json.dumps(item[key], ensure_ascii=False) for item in data if key in item]
+    return pd.DataFrame({'value': pd.Series(values, dtype=object)})
+
+def analyze_json_values(filepath, key, cache=False):
     """Анализ значений по ключу (например, частота стран)."""
+    if cache:
+        variant = f"#key-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+        df = load_columnar(filepath, lambda path: _json_key_values(path, key), ['value'], variant)
+        counts = Counter()
+        for text, count in Counter(df['value']).items():
+            counts[json.loads(text)] += count
+        return counts
     data = read_json(filepath)
     values = [item[key] for item in data if key in item]
     return Counter(values)
 
-def json_to_csv(json_filepath, csv_filepath):
+def json_to_csv(json_filepath, csv_filepath, cache=False):
     """Экспорт JSON в CSV."""
-    df = json_to_dataframe(json_filepath)
+    df = json_to_dataframe_cached(json_filepath) if cache else json_to_dataframe(json_filepath)
     df.to_csv(csv_filepath, index=False)
 
-def json_to_excel(json_filepath, excel_filepath):
+def json_to_excel(json_filepath, excel_filepath, cache=False):
     """Экспорт JSON в Excel."""
-    df = json_to_dataframe(json_filepath)
+    df = json_to_dataframe_cached(json_filepath) if cache else json_to_dataframe(json_filepath)
     df.to_excel(excel_filepath, index=False)
 
 if __name__ == "__main__":
@@ -60,4 +80,7 @@ if __name__ == "__main__":
     print("Фильтрация по стране (USA):", filter_json_by_key("test_data.json", "country", "USA"))
     print("Анализ стран:", analyze_json_values("test_data.json", "country"))
     json_to_csv("test_data.json", "test_data.csv")
-    json_to_excel("test_data.json", "test_data.xlsx")
\ No newline at end of file
+    json_to_excel("test_data.json", "test_data.xlsx")
+
+    # Колоночный кэш: повторные запросы не разбирают JSON заново
+    print("Анализ стран (кэш):", analyze_json_values("test_data.json", "country", cache=True))
\ No newline at end of file
@@ -9,6 +9,11 @@ Key Features:
 3. Анализ трафика
 4. Выявление аномалий (например, подозрительные IP)
 5. Экспорт данных в CSV/JSON
+6. Потоковый однопроходный анализ больших логов
+7. Параллельная обработка по шардам на всех ядрах
+8. Слежение за живым логом (tail -F) со скользящим окном
+9. Колоночная типизированная загрузка и экспорт в Parquet
+10. Индекс-компаньон для повторной фильтрации по IP и времени
 
 Типичные кейсы:
 - Анализ веб-серверов
@@ -16,15 +21,31 @@ Key Features:
 - Мониторинг подозрительной активности
 """
 
+import os
 import re
-from collections import Counter
+import sqlite3
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
 import pandas as pd
 import json
 
+# Регулярное выражение компилируется один раз при импорте модуля
+LOG_PATTERN = re.compile(r'(\d+\.\d+\.\d+\.\d+) .* \[(.*?)\] "(.*?)" (\d+) (\d+)')
+LOG_PATTERN_MULTILINE = re.compile('^' + LOG_PATTERN.pattern, re.MULTILINE)
+LOG_PATTERN_BYTES = re.compile(LOG_PATTERN.pattern.encode())
+LOG_FIELDS = ('ip', 'time', 'request', 'status', 'bytes')
+
+LOG_TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+
+# Размер порции строк для потокового чтения (в байтах)
+CHUNK_SIZE = 4 * 1024 * 1024
+
 def parse_log_line(line):
     """Парсинг одной строки лога (Nginx/Apache)."""
-    pattern = r'(\d+\.\d+\.\d+\.\d+) .* \[(.*?)\] "(.*?)" (\d+) (\d+)'
-    match = re.match(pattern, line)
+    match = LOG_PATTERN.match(line)
     if match:
         return {
             'ip': match.group(1),
@@ -59,10 +80,441 @@ def logs_to_dataframe(filepath):
         data = [parse_log_line(line) for line in f if parse_log_line(line)]
     return pd.DataFrame(data)
 
-def export_logs_to_json(filepath, output_file):
-    """Экспорт логов в JSON."""
-    df = logs_to_dataframe(filepath)
-    df.to_json(output_file, orient='records', indent=4)
+def export_logs_to_json(filepath, output_file, typed=False):
+    """Экспорт логов в JSON (typed=True — через колоночную загрузку)."""
+    if typed:
+        df = logs_to_typed_dataframe(filepath)
+        df.to_json(output_file, orient='records', indent=4, date_format='iso')
+    else:
+        df = logs_to_dataframe(filepath)
+        df.to_json(output_file, orient='records', indent=4)
+
+def iter_log_chunks(filepath, chunk_size=CHUNK_SIZE):
+    """Потоковое чтение лога порциями строк (память ограничена chunk_size)."""
+    with open(filepath, 'r', errors='replace', buffering=chunk_size) as f:
+        while True:
+            lines = f.readlines(chunk_size)
+            if not lines:
+                break
+            yield lines
+
+def analyze_log_stream(filepath, sinks=None, chunk_size=CHUNK_SIZE):
+    """Однопроходный анализ лога: статус-коды, IP и выходные приёмники за одно чтение."""
+    statuses = Counter()
+    ips = Counter()
+    total = parsed = 0
+    match = LOG_PATTERN.match
+    sinks = sinks or []
+
+    for lines in iter_log_chunks(filepath, chunk_size):
+        total += len(lines)
+        for line in lines:
+            m = match(line)
+            if not m:
+                continue
+            parsed += 1
+            ip, _, _, status, _ = m.groups()
+            statuses[status] += 1
+            ips[ip] += 1
+            if sinks:
+                record = dict(zip(LOG_FIELDS, m.groups()))
+                for sink in sinks:
+                    sink(record)
+
+    return {'lines': total, 'parsed': parsed, 'statuses': statuses, 'ips': ips}
+
+def suspicious_ips_from_counts(ip_counts, threshold=100):
+    """IP с числом запросов выше порога по готовому счётчику."""
+    return [ip for ip, count in ip_counts.items() if count > threshold]
+
+def export_logs_to_jsonl(filepath, output_file, chunk_size=CHUNK_SIZE):
+    """Потоковый экспорт логов в JSON Lines (без загрузки всего файла)."""
+    with open(output_file, 'w', encoding='utf-8') as out:
+        def write_record(record):
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return analyze_log_stream(filepath, sinks=[write_record], chunk_size=chunk_size)
+
+def benchmark_log_analysis(filepath, threshold=100):
+    """Сравнение скорости (строк/с): старые функции против однопроходного анализа."""
+    start = time.perf_counter()
+    count_status_codes(filepath)
+    detect_suspicious_ips(filepath, threshold)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = analyze_log_stream(filepath)
+    suspicious_ips_from_counts(result['ips'], threshold)
+    stream_time = time.perf_counter() - start
+
+    lines = result['lines']
+    return {
+        'lines': lines,
+        'legacy_lines_per_sec': lines / legacy_time if legacy_time else float('inf'),
+        'stream_lines_per_sec': lines / stream_time if stream_time else float('inf'),
+    }
+
+def split_log_shards(filepath, n_shards):
+    """Разбиение лога на диапазоны байтов, выровненные по границам строк."""
+    size = os.path.getsize(filepath)
+    if size == 0:
+        return []
+    n_shards = max(1, min(n_shards, size))
+    bounds = [0]
+    with open(filepath, 'rb') as f:
+        for i in range(1, n_shards):
+            f.seek(size * i // n_shards - 1)
+            f.readline()
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def process_log_shard(filepath, start, end, chunk_size=CHUNK_SIZE):
+    """Подсчёт статус-кодов, запросов и байтов по IP в одном диапазоне файла."""
+    statuses = Counter()
+    ips = Counter()
+    bytes_per_ip = Counter()
+    match = LOG_PATTERN_BYTES.match
+
+    def consume(lines):
+        for line in lines:
+            m = match(line)
+            if m:
+                ip, _, _, status, size = m.groups()
+                statuses[status] += 1
+                ips[ip] += 1
+                bytes_per_ip[ip] += int(size)
+
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        tail = b''
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            lines = (tail + data).split(b'\n')
+            tail = lines.pop()
+            consume(lines)
+        if tail:
+            consume([tail])
+
+    decode = lambda counter: Counter({k.decode(): v for k, v in counter.items()})
+    return decode(statuses), decode(ips), decode(bytes_per_ip)
+
+def analyze_log_parallel(filepath, workers=None, shards_per_worker=4):
+    """Параллельный анализ лога по шардам в пуле процессов с объединением Counter."""
+    workers = workers or os.cpu_count() or 1
+    shards = split_log_shards(filepath, workers * shards_per_worker)
+    statuses = Counter()
+    ips = Counter()
+    bytes_per_ip = Counter()
+
+    if workers == 1 or len(shards) <= 1:
+        results = (process_log_shard(filepath, start, end) for start, end in shards)
+        for shard_statuses, shard_ips, shard_bytes in results:
+            statuses.update(shard_statuses)
+            ips.update(shard_ips)
+            bytes_per_ip.update(shard_bytes)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(process_log_shard, filepath, start, end) for start, end in shards]
+            # Объединение в порядке шардов — результат детерминирован
+            for future in futures:
+                shard_statuses, shard_ips, shard_bytes = future.result()
+                statuses.update(shard_statuses)
+                ips.update(shard_ips)
+                bytes_per_ip.update(shard_bytes)
+
+    return {'statuses': statuses, 'ips': ips, 'bytes_per_ip': bytes_per_ip}
+
+def parse_log_time(value):
+    """Преобразование поля time лога в Unix-время (None при ошибке)."""
+    try:
+        return datetime.strptime(value, LOG_TIME_FORMAT).timestamp()
+    except ValueError:
+        return None
+
+class SlidingWindowCounter:
+    """Счётчик запросов по IP в скользящем окне времени.
+
+    Окно разбито на корзины по bucket_seconds секунд; каждая запись
+    добавляется и удаляется ровно один раз (амортизированно O(1)),
+    а в памяти хранятся только корзины текущего окна.
+    """
+
+    def __init__(self, window_seconds=60, bucket_seconds=1):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = max(1, int(window_seconds // bucket_seconds))
+        self.buckets = deque()
+        self.totals = Counter()
+
+    def add(self, key, timestamp):
+        """Добавление события и возврат текущего счётчика ключа в окне."""
+        bucket_id = int(timestamp // self.bucket_seconds)
+        if not self.buckets or self.buckets[-1][0] < bucket_id:
+            self.buckets.append((bucket_id, Counter()))
+            self._expire(bucket_id)
+        self.buckets[-1][1][key] += 1
+        self.totals[key] += 1
+        return self.totals[key]
+
+    def _expire(self, current_bucket):
+        """Удаление корзин, вышедших за пределы окна."""
+        while self.buckets and self.buckets[0][0] <= current_bucket - self.n_buckets:
+            _, counts = self.buckets.popleft()
+            for key, count in counts.items():
+                left = self.totals[key] - count
+                if left > 0:
+                    self.totals[key] = left
+                else:
+                    del self.totals[key]
+
+def follow_log(filepath, poll_interval=1.0, from_start=False, stop=None):
+    """Чтение новых строк растущего лога (tail -F) с учётом ротации и усечения."""
+    f = open(filepath, 'r', errors='replace')
+    if not from_start:
+        f.seek(0, os.SEEK_END)
+    inode = os.fstat(f.fileno()).st_ino
+    partial = ''
+    try:
+        while stop is None or not stop():
+            line = f.readline()
+            if line:
+                if line.endswith('\n'):
+                    yield partial + line
+                    partial = ''
+                else:
+                    partial += line
+                continue
+
+            try:
+                st = os.stat(filepath)
+            except FileNotFoundError:
+                time.sleep(poll_interval)
+                continue
+
+            if st.st_ino != inode:
+                # Файл ротирован: старый дочитан до конца, открываем новый
+                f.close()
+                f = open(filepath, 'r', errors='replace')
+                inode = os.fstat(f.fileno()).st_ino
+                partial = ''
+            elif st.st_size < f.tell():
+                # Файл усечён (copytruncate)
+                f.seek(0)
+                partial = ''
+            else:
+                time.sleep(poll_interval)
+    finally:
+        f.close()
+
+def watch_suspicious_ips(filepath, threshold=100, window_seconds=60, bucket_seconds=1, **follow_kwargs):
+    """Непрерывное выявление IP, превысивших порог запросов в скользящем окне."""
+    counter = SlidingWindowCounter(window_seconds, bucket_seconds)
+    for line in follow_log(filepath, **follow_kwargs):
+        m = LOG_PATTERN.match(line)
+        if not m:
+            continue
+        ip, log_time = m.group(1), m.group(2)
+        timestamp = parse_log_time(log_time)
+        if timestamp is None:
+            timestamp = time.time()
+        count = counter.add(ip, timestamp)
+        # Оповещение только в момент пересечения порога
+        if count == threshold + 1:
+            yield {'ip': ip, 'count': count, 'time': log_time, 'window_seconds': window_seconds}
+
+def _columns_to_frame(columns):
+    """Сборка типизированного DataFrame из столбцов одной порции."""
+    ips, times, reqs, statuses, sizes = columns
+    # Метки времени сильно повторяются: разбираем только уникальные значения
+    times = pd.Categorical(times)
+    parsed = pd.to_datetime(times.categories, format=LOG_TIME_FORMAT, utc=True, errors='coerce')
+    # Шаблон принимает любое число в поле статуса: не влезающие в int16 значения становятся NA
+    status = np.fromiter(map(int, statuses), dtype=np.int64, count=len(statuses))
+    overflow = status > np.iinfo(np.int16).max
+    return pd.DataFrame({
+        'ip': pd.Categorical(ips),
+        'time': parsed.take(times.codes),
+        'request': np.array(reqs, dtype=object),
+        'status': pd.arrays.IntegerArray(np.where(overflow, 0, status).astype(np.int16), overflow),
+        'bytes': np.fromiter(map(int, sizes), dtype=np.int64, count=len(sizes)),
+    })
+
+def iter_log_frames(filepath, chunk_size=CHUNK_SIZE):
+    """Колоночная загрузка лога порциями: типизированные DataFrame без словарей на строку."""
+    for lines in iter_log_chunks(filepath, chunk_size):
+        rows = LOG_PATTERN_MULTILINE.findall(''.join(lines))
+        if rows:
+            yield _columns_to_frame(list(zip(*rows)))
+
+def logs_to_typed_dataframe(filepath, chunk_size=CHUNK_SIZE):
+    """Конвертация логов в DataFrame с типами: category, datetime64, Int16 (с NA), int64."""
+    frames = list(iter_log_frames(filepath, chunk_size))
+    if not frames:
+        return _columns_to_frame([[]] * len(LOG_FIELDS))
+    ip = pd.api.types.union_categoricals([frame['ip'] for frame in frames])
+    df = pd.concat(frames, ignore_index=True)
+    df['ip'] = ip
+    return df
+
+def export_logs_to_parquet(filepath, output_file, chunk_size=CHUNK_SIZE):
+    """Потоковый экспорт логов в Parquet (требуется pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("Установите pyarrow: pip install pyarrow")
+        return False
+
+    writer = None
+    try:
+        for frame in iter_log_frames(filepath, chunk_size):
+            # IP храним как строку: словари категорий у порций различаются
+            frame['ip'] = frame['ip'].astype(str)
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_file, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return writer is not None
+
+def benchmark_log_dataframe(filepath):
+    """Сравнение времени и памяти: logs_to_dataframe против колоночной загрузки."""
+    start = time.perf_counter()
+    df_legacy = logs_to_dataframe(filepath)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df_typed = logs_to_typed_dataframe(filepath)
+    typed_time = time.perf_counter() - start
+
+    return {
+        'rows': len(df_typed),
+        'legacy_seconds': legacy_time,
+        'typed_seconds': typed_time,
+        'legacy_memory_bytes': int(df_legacy.memory_usage(deep=True).sum()),
+        'typed_memory_bytes': int(df_typed.memory_usage(deep=True).sum()),
+    }
+
+def log_index_path(filepath):
+    """Путь к индексу-компаньону лога."""
+    return filepath + '.idx.sqlite'
+
+def build_log_index(filepath, index_path=None, bucket_seconds=60):
+    """Построение индекса лога: точный IP -> смещения строк, корзины времени -> диапазоны байтов."""
+    index_path = index_path or log_index_path(filepath)
+    st = os.stat(filepath)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    conn = sqlite3.connect(index_path)
+    conn.executescript("""
+        CREATE TABLE meta (size INTEGER, mtime_ns INTEGER, bucket_seconds INTEGER);
+        CREATE TABLE ip_lines (ip TEXT, offset INTEGER);
+        CREATE TABLE time_buckets (bucket INTEGER PRIMARY KEY, first_offset INTEGER, last_offset INTEGER);
+    """)
+    match = LOG_PATTERN_BYTES.match
+    time_cache = {}
+    buckets = {}
+    batch = []
+    offset = 0
+    with open(filepath, 'rb', buffering=CHUNK_SIZE) as f:
+        for line in f:
+            m = match(line)
+            if m:
+                ip, log_time = m.group(1), m.group(2)
+                batch.append((ip.decode(), offset))
+                ts = time_cache.get(log_time)
+                if ts is None and log_time not in time_cache:
+                    ts = time_cache[log_time] = parse_log_time(log_time.decode(errors='replace'))
+                if ts is not None:
+                    bucket = int(ts // bucket_seconds)
+                    bounds = buckets.get(bucket)
+                    if bounds is None:
+                        buckets[bucket] = [offset, offset]
+                    else:
+                        bounds[1] = offset
+                if len(batch) >= 100000:
+                    conn.executemany("INSERT INTO ip_lines VALUES (?, ?)", batch)
+                    batch.clear()
+            offset += len(line)
+            if len(time_cache) > 100000:
+                time_cache.clear()
+
+    conn.executemany("INSERT INTO ip_lines VALUES (?, ?)", batch)
+    conn.executemany("INSERT INTO time_buckets VALUES (?, ?, ?)",
+                     ((b, first, last) for b, (first, last) in buckets.items()))
+    conn.execute("CREATE INDEX idx_ip ON ip_lines (ip)")
+    conn.execute("INSERT INTO meta VALUES (?, ?, ?)", (st.st_size, st.st_mtime_ns, bucket_seconds))
+    conn.commit()
+    return conn
+
+def open_log_index(filepath, index_path=None, bucket_seconds=60):
+    """Открытие индекса; перестраивается, если изменились размер или mtime лога."""
+    index_path = index_path or log_index_path(filepath)
+    if os.path.exists(index_path):
+        st = os.stat(filepath)
+        conn = sqlite3.connect(index_path)
+        try:
+            meta = conn.execute("SELECT size, mtime_ns, bucket_seconds FROM meta").fetchone()
+        except sqlite3.DatabaseError:
+            meta = None
+        if meta == (st.st_size, st.st_mtime_ns, bucket_seconds):
+            return conn
+        conn.close()
+    return build_log_index(filepath, index_path, bucket_seconds)
+
+def _read_lines_at(filepath, offsets):
+    """Чтение строк лога по смещениям."""
+    lines = []
+    with open(filepath, 'rb') as f:
+        for offset in offsets:
+            f.seek(offset)
+            lines.append(f.readline().decode(errors='replace'))
+    return lines
+
+def filter_logs_by_ip_indexed(filepath, ip, index_path=None):
+    """Фильтрация логов по точному IP через индекс (без сканирования файла)."""
+    conn = open_log_index(filepath, index_path)
+    with conn:
+        offsets = [row[0] for row in conn.execute(
+            "SELECT offset FROM ip_lines WHERE ip = ? ORDER BY offset", (ip,))]
+    conn.close()
+    return _read_lines_at(filepath, offsets)
+
+def filter_logs_by_time_indexed(filepath, start, end, index_path=None, bucket_seconds=60):
+    """Фильтрация логов по интервалу времени [start, end] через индекс корзин."""
+    start_ts = start.timestamp() if isinstance(start, datetime) else start
+    end_ts = end.timestamp() if isinstance(end, datetime) else end
+    conn = open_log_index(filepath, index_path, bucket_seconds)
+    with conn:
+        first, last = conn.execute(
+            "SELECT MIN(first_offset), MAX(last_offset) FROM time_buckets WHERE bucket BETWEEN ? AND ?",
+            (int(start_ts // bucket_seconds), int(end_ts // bucket_seconds))).fetchone()
+    conn.close()
+    if first is None:
+        return []
+
+    # Читаем только диапазон байтов найденных корзин и уточняем по точному времени
+    result = []
+    with open(filepath, 'rb') as f:
+        f.seek(first)
+        while f.tell() <= last:
+            line = f.readline()
+            if not line:
+                break
+            m = LOG_PATTERN_BYTES.match(line)
+            if m:
+                ts = parse_log_time(m.group(2).decode(errors='replace'))
+                if ts is not None and start_ts <= ts <= end_ts:
+                    result.append(line.decode(errors='replace'))
+    return result
 
 if __name__ == "__main__":
     # Тестовые данные
@@ -78,4 +530,38 @@ if __name__ == "__main__":
     print("Подозрительные IP:", detect_suspicious_ips("test_data.log", threshold=1))
     df = logs_to_dataframe("test_data.log")
     print(df.head())
-    export_logs_to_json("test_data.log", "logs.json")
\ No newline at end of file
+    export_logs_to_json("test_data.log", "logs.json")
+
+    # Однопроходный потоковый анализ
+    stats = analyze_log_stream("test_data.log")
+    print("Статус-коды (поток):", stats['statuses'])
+    print("Подозрительные IP (поток):", suspicious_ips_from_counts(stats['ips'], threshold=1))
+    export_logs_to_jsonl("test_data.log", "logs.jsonl")
+
+    # Колоночная загрузка с типами
+    typed_df = logs_to_typed_dataframe("test_data.log")
+    print(typed_df.dtypes)
+    export_logs_to_json("test_data.log", "logs_typed.json", typed=True)
+    export_logs_to_parquet("test_data.log", "logs.parquet")
+    print("Память и время:", benchmark_log_dataframe("test_data.log"))
+
+    # Повторная фильтрация через индекс (точное совпадение IP)
+    print("Строки 10.0.0.1:", filter_logs_by_ip_indexed("test_data.log", "10.0.0.1"))
+    print("Строки за 2 секунды:", filter_logs_by_time_indexed(
+        "test_data.log",
+        datetime.fromisoformat("2023-01-01T00:00:01+00:00"),
+        datetime.fromisoformat("2023-01-01T00:00:02+00:00")))
+    print("Бенчмарк:", benchmark_log_analysis("test_data.log", threshold=1))
+
+    # Параллельный анализ по шардам
+    parallel = analyze_log_parallel("test_data.log", workers=2)
+    print("Статус-коды (параллельно):", parallel['statuses'])
+    print("Байты по IP:", parallel['bytes_per_ip'])
+
+    # Слежение за логом: читаем с начала и останавливаемся через секунду
+    deadline = time.time() + 1
+    with open("live_test.log", 'w') as f:
+        f.write(TEST_LOG + "\n")
+    for alert in watch_suspicious_ips("live_test.log", threshold=0, from_start=True,
+                                      poll_interval=0.2, stop=lambda: time.time() > deadline):
+        print("Оповещение:", alert)
\ No newline at end of file
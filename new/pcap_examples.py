@@ -7,7 +7,11 @@ Key Features:
 1. Анализ сетевого трафика (IP, порты, протоколы)
 2. Фильтрация пакетов по критериям
 3. Экспорт данных в CSV для дальнейшего анализа
-4. Интеграция с Wireshark/tshark
+4. Интеграция с Wireshark/tshark (потоковый параллельный бэкенд)
+5. Потоковое чтение больших PCAP/PCAPNG за один проход
+6. Быстрый декодер заголовков через mmap (scapy — только для глубокого анализа)
+7. Агрегация пакетов в потоки (5-tuple) с ограниченной памятью
+8. Параллельный анализ наборов из сотен PCAP-файлов
 
 Типичные кейсы:
 - Исследование сетевых атак
@@ -15,11 +19,29 @@ Key Features:
 - Анализ трафика приложений
 """
 
+import csv
+import glob
+import mmap
+import socket
+import struct
+import tempfile
+import time
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-from scapy.all import rdpcap, IP, TCP, UDP
+from scapy.all import rdpcap, PcapReader, IP, IPv6, TCP, UDP
+from scapy.layers.inet6 import _IPv6ExtHdr
 import subprocess
 import os
 
+# Поля, извлекаемые из каждого пакета при потоковом чтении
+PACKET_FIELDS = ('src_ip', 'dst_ip', 'protocol', 'src_port', 'dst_port', 'size')
+
+# Сигнатуры классического PCAP (порядок байтов, микро- и наносекунды)
+CLASSIC_PCAP_MAGIC = (b'\xd4\xc3\xb2\xa1', b'\x4d\x3c\xb2\xa1', b'\xa1\xb2\xc3\xd4', b'\xa1\xb2\x3c\x4d')
+
 def read_pcap(filepath):
     """Чтение PCAP-файла с обработкой ошибок."""
     try:
@@ -65,24 +87,577 @@ def export_to_csv(pcap_file, csv_file):
             })
     pd.DataFrame(data).to_csv(csv_file, index=False)
 
-def analyze_with_tshark(pcap_file):
-    """Анализ PCAP через tshark (если установлен)."""
+def analyze_with_tshark(pcap_file, workers=None, tshark_path='tshark'):
+    """Анализ PCAP через tshark (если установлен): колоночный DataFrame как у быстрого декодера."""
     if not os.path.exists(pcap_file):
         print("Файл не найден.")
-        return
-    
+        return None
+
+    workers = workers or os.cpu_count() or 1
     try:
-        result = subprocess.run(
-            ["tshark", "-r", pcap_file, "-T", "fields", "-e", "ip.src", "-e", "ip.dst"],
-            capture_output=True, text=True
-        )
-        print(result.stdout)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parts = split_pcap(pcap_file, workers, tmp_dir)
+            with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+                results = list(pool.map(lambda part: _read_tshark_fields(part, tshark_path), parts))
     except FileNotFoundError:
         print("Установите Wireshark/tshark для использования этой функции.")
+        return None
+    except RuntimeError as e:
+        # tshark не разобрал ни одного пакета (при частичном разборе выдаётся предупреждение)
+        print(f"Ошибка tshark: {e}")
+        return None
+
+    # Части склеиваются в исходном порядке пакетов
+    ip_table = {}
+    columns = [array('I'), array('I'), array('B'), array('i'), array('i'), array('I')]
+    for part_ips, part_columns in results:
+        remap = [ip_table.setdefault(ip, len(ip_table)) for ip in part_ips]
+        columns[0].extend(remap[code] for code in part_columns[0])
+        columns[1].extend(remap[code] for code in part_columns[1])
+        for column, part_column in zip(columns[2:], part_columns[2:]):
+            column.extend(part_column)
+    return _packet_frame(list(ip_table), *columns)
+
+def iter_packet_fields(pcap_file):
+    """Потоковое чтение PCAP/PCAPNG по одной записи: только IP, протокол, порты и длина."""
+    with PcapReader(pcap_file) as reader:
+        for pkt in reader:
+            if IP in pkt:
+                layer = pkt[IP]
+                proto = layer.proto
+            elif IPv6 in pkt:
+                layer = pkt[IPv6]
+                proto = layer.nh
+                # Цепочка заголовков расширения (Hop-by-Hop, Routing, Fragment, ...) до транспорта
+                ext = layer.payload
+                while isinstance(ext, _IPv6ExtHdr):
+                    proto = ext.nh
+                    ext = ext.payload
+            else:
+                continue
+            sport = dport = None
+            if TCP in pkt:
+                sport, dport = pkt[TCP].sport, pkt[TCP].dport
+            elif UDP in pkt:
+                sport, dport = pkt[UDP].sport, pkt[UDP].dport
+            yield layer.src, layer.dst, proto, sport, dport, len(pkt)
+
+def analyze_pcap_stream(pcap_file, csv_file=None):
+    """Все анализы за один проход: уникальные IP, протоколы, экспорт в CSV."""
+    ips = set()
+    protocols = Counter()
+    packets = 0
+    out = open(csv_file, 'w', newline='') if csv_file else None
+    try:
+        writer = csv.writer(out) if out else None
+        if writer:
+            writer.writerow(PACKET_FIELDS)
+        for fields in iter_packet_fields(pcap_file):
+            packets += 1
+            ips.add(fields[0])
+            ips.add(fields[1])
+            protocols[fields[2]] += 1
+            if writer:
+                writer.writerow(fields)
+    finally:
+        if out:
+            out.close()
+    return {'packets': packets, 'ips': sorted(ips), 'protocols': protocols}
+
+def iter_packets_by_protocol(pcap_file, protocol):
+    """Ленивая фильтрация пакетов по протоколу (TCP/UDP) без загрузки всего файла."""
+    with PcapReader(pcap_file) as reader:
+        for pkt in reader:
+            if protocol in pkt:
+                yield pkt
+
+# Типы канального уровня (LINKTYPE_*), которые понимает быстрый декодер
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = (101, 12, 228, 229)
+LINKTYPE_LINUX_SLL = 113
+IPV6_EXT_HEADERS = (0, 43, 60)
+
+def iter_raw_records(pcap_file):
+    """Чтение записей PCAP/PCAPNG через mmap: (linktype, буфер, смещение, длина, время)."""
+    with open(pcap_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 24:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            magic = buf[:4]
+            if magic == b'\x0a\x0d\x0d\x0a':
+                yield from _iter_pcapng_records(buf)
+            else:
+                yield from _iter_pcap_records(buf)
+
+def _iter_pcap_records(buf):
+    """Записи классического PCAP (любой порядок байтов, мкс/нс)."""
+    magic = buf[:4]
+    if magic in (b'\xd4\xc3\xb2\xa1', b'\x4d\x3c\xb2\xa1'):
+        endian = '<'
+    elif magic in (b'\xa1\xb2\xc3\xd4', b'\xa1\xb2\x3c\x4d'):
+        endian = '>'
+    else:
+        raise ValueError("Неизвестный формат PCAP")
+    resolution = 1e-9 if magic in (b'\x4d\x3c\xb2\xa1', b'\xa1\xb2\x3c\x4d') else 1e-6
+    linktype = struct.unpack_from(endian + 'I', buf, 20)[0] & 0xFFFF
+    record = struct.Struct(endian + 'IIII')
+    offset, end = 24, len(buf)
+    while offset + 16 <= end:
+        ts_sec, ts_frac, incl_len, _ = record.unpack_from(buf, offset)
+        offset += 16
+        if offset + incl_len > end:
+            break
+        yield linktype, buf, offset, incl_len, ts_sec + ts_frac * resolution
+        offset += incl_len
+
+def _iter_pcapng_records(buf):
+    """Пакеты из блоков EPB/SPB формата PCAPNG."""
+    offset, end = 0, len(buf)
+    endian = '<'
+    interfaces = []
+    last_ts = 0.0
+    while offset + 12 <= end:
+        if buf[offset:offset + 4] == b'\x0a\x0d\x0d\x0a':
+            endian = '<' if buf[offset + 8:offset + 12] == b'\x4d\x3c\x2b\x1a' else '>'
+            interfaces = []
+        block_type, block_len = struct.unpack_from(endian + 'II', buf, offset)
+        if block_len < 12 or offset + block_len > end:
+            break
+        if block_type == 1:
+            linktype = struct.unpack_from(endian + 'H', buf, offset + 8)[0]
+            interfaces.append((linktype, _pcapng_ts_resolution(buf, offset + 16, offset + block_len - 4, endian)))
+        elif block_type == 6:
+            iface, ts_high, ts_low, cap_len = struct.unpack_from(endian + 'IIII', buf, offset + 8)
+            if iface < len(interfaces):
+                linktype, resolution = interfaces[iface]
+                last_ts = ((ts_high << 32) | ts_low) * resolution
+                yield linktype, buf, offset + 28, cap_len, last_ts
+        elif block_type == 3 and interfaces:
+            # В SPB нет метки времени — берём время предыдущего пакета
+            orig_len = struct.unpack_from(endian + 'I', buf, offset + 8)[0]
+            yield interfaces[0][0], buf, offset + 12, min(orig_len, block_len - 16), last_ts
+        offset += block_len
+
+def _pcapng_ts_resolution(buf, offset, end, endian):
+    """Разрешение меток времени интерфейса PCAPNG (опция if_tsresol, по умолчанию мкс)."""
+    while offset + 4 <= end:
+        code, length = struct.unpack_from(endian + 'HH', buf, offset)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            value = buf[offset + 4]
+            return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+        offset += 4 + (length + 3) // 4 * 4
+    return 1e-6
+
+def decode_packet_headers(linktype, buf, offset, length):
+    """Разбор заголовков Ethernet/IPv4/IPv6/TCP/UDP: (src, dst, proto, sport, dport, флаги TCP) или None."""
+    end = offset + length
+    if linktype == LINKTYPE_ETHERNET:
+        if length < 14:
+            return None
+        ethertype = struct.unpack_from('!H', buf, offset + 12)[0]
+        l3 = offset + 14
+        while ethertype in (0x8100, 0x88A8) and l3 + 4 <= end:
+            ethertype = struct.unpack_from('!H', buf, l3 + 2)[0]
+            l3 += 4
+    elif linktype in LINKTYPE_RAW:
+        if length < 1:
+            return None
+        ethertype = 0x0800 if buf[offset] >> 4 == 4 else 0x86DD
+        l3 = offset
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if length < 16:
+            return None
+        ethertype = struct.unpack_from('!H', buf, offset + 14)[0]
+        l3 = offset + 16
+    else:
+        return None
+
+    if ethertype == 0x0800:
+        if l3 + 20 > end:
+            return None
+        ihl = (buf[l3] & 0x0F) * 4
+        frag = struct.unpack_from('!H', buf, l3 + 6)[0] & 0x1FFF
+        proto = buf[l3 + 9]
+        src, dst = buf[l3 + 12:l3 + 16], buf[l3 + 16:l3 + 20]
+        l4 = l3 + ihl if frag == 0 else end
+    elif ethertype == 0x86DD:
+        if l3 + 40 > end:
+            return None
+        proto = buf[l3 + 6]
+        src, dst = buf[l3 + 8:l3 + 24], buf[l3 + 24:l3 + 40]
+        l4 = l3 + 40
+        while proto in IPV6_EXT_HEADERS and l4 + 2 <= end:
+            proto, l4 = buf[l4], l4 + (buf[l4 + 1] + 1) * 8
+        if proto == 44 and l4 + 8 <= end:
+            frag = struct.unpack_from('!H', buf, l4 + 2)[0] & 0xFFF8
+            proto, l4 = buf[l4], (l4 + 8 if frag == 0 else end)
+    else:
+        return None
+
+    sport = dport = -1
+    flags = 0
+    if proto in (6, 17) and l4 + 4 <= end:
+        sport, dport = struct.unpack_from('!HH', buf, l4)
+        if proto == 6 and l4 + 14 <= end:
+            flags = buf[l4 + 13]
+    return src, dst, proto, sport, dport, flags
+
+def _ip_to_str(raw):
+    """Строковое представление IPv4/IPv6 адреса из байтов."""
+    return socket.inet_ntop(socket.AF_INET if len(raw) == 4 else socket.AF_INET6, raw)
+
+def decode_pcap_fast(pcap_file):
+    """Быстрый декодер PCAP без scapy: колоночный DataFrame src/dst/proto/порты/размер."""
+    ip_codes = {}
+    src_codes, dst_codes = array('I'), array('I')
+    protocols, sizes = array('B'), array('I')
+    src_ports, dst_ports = array('i'), array('i')
+
+    for linktype, buf, offset, length, _ in iter_raw_records(pcap_file):
+        decoded = decode_packet_headers(linktype, buf, offset, length)
+        if decoded is None:
+            continue
+        src, dst, proto, sport, dport, _ = decoded
+        # IP кодируются номерами в таблице уникальных адресов
+        src_codes.append(ip_codes.setdefault(src, len(ip_codes)))
+        dst_codes.append(ip_codes.setdefault(dst, len(ip_codes)))
+        protocols.append(proto)
+        src_ports.append(sport)
+        dst_ports.append(dport)
+        sizes.append(length)
+
+    return _packet_frame([_ip_to_str(raw) for raw in ip_codes], src_codes, dst_codes,
+                         protocols, src_ports, dst_ports, sizes)
+
+def _packet_frame(ip_table, src_codes, dst_codes, protocols, src_ports, dst_ports, sizes):
+    """Сборка колоночного DataFrame пакетов из типизированных массивов."""
+    categories = pd.Index(ip_table, dtype=object)
+    as_codes = lambda codes: pd.Categorical.from_codes(np.frombuffer(codes, dtype=np.uint32).astype(np.int32), categories)
+    return pd.DataFrame({
+        'src_ip': as_codes(src_codes),
+        'dst_ip': as_codes(dst_codes),
+        'protocol': np.frombuffer(protocols, dtype=np.uint8),
+        'src_port': np.frombuffer(src_ports, dtype=np.int32),
+        'dst_port': np.frombuffer(dst_ports, dtype=np.int32),
+        'size': np.frombuffer(sizes, dtype=np.uint32),
+    })
+
+def extract_ips_fast(pcap_file):
+    """Извлечение уникальных IP-адресов быстрым декодером."""
+    df = decode_pcap_fast(pcap_file)
+    return sorted(set(df['src_ip'].unique()) | set(df['dst_ip'].unique()))
+
+def export_to_csv_fast(pcap_file, csv_file):
+    """Экспорт метаданных трафика в CSV быстрым декодером (scapy не используется)."""
+    decode_pcap_fast(pcap_file).to_csv(csv_file, index=False)
+
+def benchmark_pcap_decoders(pcap_file):
+    """Сравнение скорости (пакетов/с): rdpcap + scapy против быстрого декодера."""
+    start = time.perf_counter()
+    packets = read_pcap(pcap_file) or []
+    legacy = [(pkt[IP].src, pkt[IP].dst, pkt[IP].proto, len(pkt)) for pkt in packets if IP in pkt]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = decode_pcap_fast(pcap_file)
+    fast_time = time.perf_counter() - start
+
+    total = len(packets)
+    return {
+        'packets': total,
+        'legacy_ip_packets': len(legacy),
+        'fast_ip_packets': len(fast),
+        'legacy_packets_per_sec': total / legacy_time if legacy_time else float('inf'),
+        'fast_packets_per_sec': total / fast_time if fast_time else float('inf'),
+    }
+
+FLOW_FIELDS = ('src_ip', 'dst_ip', 'protocol', 'src_port', 'dst_port',
+               'first_seen', 'last_seen', 'packets', 'bytes', 'tcp_flags')
+TCP_FLAG_NAMES = 'FSRPAUEC'
+
+def tcp_flags_to_str(flags):
+    """Строковое представление флагов TCP (например, 'SA')."""
+    return ''.join(name for bit, name in enumerate(TCP_FLAG_NAMES) if flags & (1 << bit))
+
+def _flow_to_dict(key, record):
+    """Преобразование записи таблицы потоков в словарь для экспорта."""
+    src, dst, proto, sport, dport = key
+    first, last, packets, size, flags = record
+    return dict(zip(FLOW_FIELDS, (
+        _ip_to_str(src), _ip_to_str(dst), proto, sport, dport,
+        first, last, packets, size, tcp_flags_to_str(flags))))
+
+def iter_flows(pcap_file, idle_timeout=60, max_flows=1000000):
+    """Агрегация пакетов в двунаправленные потоки (5-tuple) с вытеснением неактивных.
+
+    Таблица упорядочена по времени последнего пакета, поэтому истёкшие
+    потоки снимаются с её начала за амортизированное O(1). При
+    превышении max_flows досрочно выгружаются самые старые потоки.
+    """
+    flows = OrderedDict()
+    for linktype, buf, offset, length, ts in iter_raw_records(pcap_file):
+        decoded = decode_packet_headers(linktype, buf, offset, length)
+        if decoded is None:
+            continue
+        src, dst, proto, sport, dport, flags = decoded
+        key = (src, dst, proto, sport, dport)
+        record = flows.get(key)
+        if record is None:
+            # Ответный пакет относится к потоку, открытому инициатором
+            reverse = (dst, src, proto, dport, sport)
+            record = flows.get(reverse)
+            if record is not None:
+                key = reverse
+        if record is None:
+            flows[key] = [ts, ts, 1, length, flags]
+        else:
+            record[1] = ts
+            record[2] += 1
+            record[3] += length
+            record[4] |= flags
+            flows.move_to_end(key)
+
+        while flows:
+            oldest_key, oldest = next(iter(flows.items()))
+            if ts - oldest[1] <= idle_timeout and len(flows) <= max_flows:
+                break
+            del flows[oldest_key]
+            yield _flow_to_dict(oldest_key, oldest)
+
+    for key, record in flows.items():
+        yield _flow_to_dict(key, record)
+
+def export_flows_to_csv(pcap_file, csv_file, idle_timeout=60, max_flows=1000000):
+    """Потоковый экспорт потоков (одна строка на сессию) в CSV."""
+    count = 0
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FLOW_FIELDS)
+        writer.writeheader()
+        for flow in iter_flows(pcap_file, idle_timeout, max_flows):
+            writer.writerow(flow)
+            count += 1
+    return count
+
+CAPTURE_EXTENSIONS = ('.pcap', '.pcapng', '.cap')
+
+def find_capture_files(path):
+    """Список файлов захвата: каталог (рекурсивно) или glob-шаблон, в отсортированном порядке."""
+    if os.path.isdir(path):
+        files = glob.glob(os.path.join(path, '**', '*'), recursive=True)
+        files = [f for f in files if f.lower().endswith(CAPTURE_EXTENSIONS)]
+    else:
+        files = glob.glob(path, recursive=True)
+    return sorted(f for f in files if os.path.isfile(f))
+
+def analyze_capture_file(pcap_file, part_file=None, part_format='csv'):
+    """Анализ одного файла из набора (выполняется в процессе пула)."""
+    start = time.perf_counter()
+    df = decode_pcap_fast(pcap_file)
+    ips = set(df['src_ip'].unique()) | set(df['dst_ip'].unique())
+    protocols = Counter(df['protocol'].value_counts().to_dict())
+    if part_file:
+        df.insert(0, 'capture', os.path.basename(pcap_file))
+        if part_format == 'parquet':
+            df['src_ip'] = df['src_ip'].astype(str)
+            df['dst_ip'] = df['dst_ip'].astype(str)
+            df.to_parquet(part_file, index=False)
+        else:
+            df.to_csv(part_file, index=False)
+    return {
+        'file': pcap_file,
+        'packets': len(df),
+        'ips': ips,
+        'protocols': protocols,
+        'seconds': time.perf_counter() - start,
+    }
+
+def _merge_csv_parts(part_files, csv_file):
+    """Склейка CSV-частей в один файл с одним заголовком."""
+    with open(csv_file, 'w', newline='') as out:
+        for i, part in enumerate(part_files):
+            with open(part, 'r', newline='') as f:
+                header = f.readline()
+                if i == 0:
+                    out.write(header)
+                for line in f:
+                    out.write(line)
+
+def _merge_parquet_parts(part_files, parquet_file):
+    """Склейка Parquet-частей в один файл."""
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for part in part_files:
+            table = pq.read_table(part)
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_file, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+def analyze_capture_set(path, output_file=None, output_format='csv', workers=None, progress=True):
+    """Параллельный анализ набора PCAP-файлов с детерминированным объединением результатов."""
+    files = find_capture_files(path)
+    part_files = [f"{output_file}.part{i:06d}" for i in range(len(files))] if output_file else [None] * len(files)
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(analyze_capture_file, pcap_file, part, output_format): pcap_file
+            for pcap_file, part in zip(files, part_files)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            pcap_file = futures[future]
+            try:
+                results[pcap_file] = future.result()
+            except Exception as e:
+                print(f"Ошибка обработки {pcap_file}: {e}")
+                continue
+            if progress:
+                r = results[pcap_file]
+                print(f"[{done}/{len(files)}] {pcap_file}: {r['packets']} пакетов за {r['seconds']:.2f} с")
+
+    # Объединение строго в порядке файлов, а не завершения задач
+    ips = set()
+    protocols = Counter()
+    timings = []
+    for pcap_file in files:
+        if pcap_file in results:
+            r = results[pcap_file]
+            ips |= r['ips']
+            protocols.update(r['protocols'])
+            timings.append((pcap_file, r['packets'], r['seconds']))
+
+    if output_file:
+        ready = [part for pcap_file, part in zip(files, part_files) if pcap_file in results]
+        try:
+            if output_format == 'parquet':
+                _merge_parquet_parts(ready, output_file)
+            else:
+                _merge_csv_parts(ready, output_file)
+        finally:
+            for part in part_files:
+                if os.path.exists(part):
+                    os.remove(part)
+
+    return {
+        'files': len(files),
+        'packets': sum(t[1] for t in timings),
+        'ips': sorted(ips),
+        'protocols': protocols,
+        # Самые медленные файлы — первыми, чтобы были видны «отстающие»
+        'timings': sorted(timings, key=lambda t: t[2], reverse=True),
+    }
+
+TSHARK_FIELDS = ('ip.src', 'ip.dst', 'ipv6.src', 'ipv6.dst', 'ip.proto', 'ipv6.nxt',
+                 'tcp.srcport', 'tcp.dstport', 'udp.srcport', 'udp.dstport', 'icmpv6.type', 'frame.cap_len')
+
+def split_pcap(pcap_file, n_parts, out_dir):
+    """Разбиение классического PCAP на части по границам записей (PCAPNG не делится)."""
+    with open(pcap_file, 'rb') as f:
+        header = f.read(24)
+    # PCAPNG и прочие форматы, которые читает tshark, передаются целиком
+    if n_parts <= 1 or len(header) < 24 or header[:4] not in CLASSIC_PCAP_MAGIC:
+        return [pcap_file]
+
+    size = os.path.getsize(pcap_file)
+    bounds = [24]
+    for _, _, offset, length, _ in iter_raw_records(pcap_file):
+        record_end = offset + length
+        if record_end >= size * len(bounds) // n_parts and len(bounds) < n_parts:
+            bounds.append(record_end)
+    bounds.append(size)
+
+    parts = []
+    with open(pcap_file, 'rb') as f:
+        for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if end <= start:
+                continue
+            part = os.path.join(out_dir, f"part{i:04d}.pcap")
+            f.seek(start)
+            with open(part, 'wb') as out:
+                out.write(header)
+                remaining = end - start
+                while remaining > 0:
+                    data = f.read(min(remaining, 16 * 1024 * 1024))
+                    if not data:
+                        break
+                    out.write(data)
+                    remaining -= len(data)
+            parts.append(part)
+    return parts
+
+def _read_tshark_fields(pcap_file, tshark_path='tshark'):
+    """Построчное чтение вывода tshark -T fields в типизированные массивы."""
+    cmd = [tshark_path, "-r", pcap_file, "-T", "fields", "-E", "separator=\t", "-E", "occurrence=f"]
+    for field in TSHARK_FIELDS:
+        cmd += ["-e", field]
+
+    ip_table = {}
+    src_codes, dst_codes = array('I'), array('I')
+    protocols, sizes = array('B'), array('I')
+    src_ports, dst_ports = array('i'), array('i')
+    # stderr во временный файл: канал мог бы переполниться и остановить tshark
+    with tempfile.TemporaryFile() as stderr, \
+            subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr,
+                             text=True, bufsize=1024 * 1024) as proc:
+        for line in proc.stdout:
+            values = line.rstrip('\n').split('\t')
+            if len(values) < len(TSHARK_FIELDS):
+                continue
+            ip_src, ip_dst, ip6_src, ip6_dst, proto, nxt, tsport, tdport, usport, udport, icmp6, cap_len = values
+            src, dst = ip_src or ip6_src, ip_dst or ip6_dst
+            if not src or not dst:
+                continue
+            sport, dport = tsport or usport, tdport or udport
+            protocol = int(proto or nxt or 0)
+            if not proto and (protocol in IPV6_EXT_HEADERS or protocol == 44):
+                # ipv6.nxt — первый заголовок цепочки; транспорт берём по разобранному tshark слою
+                protocol = 6 if tsport else 17 if usport else 58 if icmp6 else protocol
+            src_codes.append(ip_table.setdefault(src, len(ip_table)))
+            dst_codes.append(ip_table.setdefault(dst, len(ip_table)))
+            protocols.append(protocol)
+            src_ports.append(int(sport) if sport else -1)
+            dst_ports.append(int(dport) if dport else -1)
+            sizes.append(int(cap_len or 0))
+        proc.wait()
+        if proc.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode('utf-8', 'replace').strip()
+            message = f"tshark завершился с кодом {proc.returncode} на {pcap_file}: {message}"
+            if not sizes:
+                raise RuntimeError(message)
+            # Обрезанный последний пакет: разобранные строки остаются в результате
+            print(f"Предупреждение: {message} (результат неполный, пакетов: {len(sizes)})")
+    return list(ip_table), (src_codes, dst_codes, protocols, src_ports, dst_ports, sizes)
 
 if __name__ == "__main__":
     
     # Демонстрация
     print("Уникальные IP:", extract_ips("new/example.pcap"))
     export_to_csv("new/example.pcap", "pcap_analysis.csv")
-    analyze_with_tshark("new/example.pcap")
\ No newline at end of file
+    tshark_df = analyze_with_tshark("new/example.pcap")
+    if tshark_df is not None:
+        print(tshark_df.head())
+
+    # Новые примеры читают файл напрямую и без него завершились бы с исключением
+    if not os.path.exists("new/example.pcap"):
+        print("Файл new/example.pcap не найден, потоковые примеры пропущены.")
+    else:
+        # Потоковый однопроходный анализ
+        stats = analyze_pcap_stream("new/example.pcap", "pcap_stream.csv")
+        print("Пакетов:", stats['packets'], "Протоколы:", stats['protocols'])
+
+        # Быстрый декодер без scapy
+        export_to_csv_fast("new/example.pcap", "pcap_fast.csv")
+        print("Бенчмарк:", benchmark_pcap_decoders("new/example.pcap"))
+
+        # Экспорт по потокам вместо пакетов
+        print("Потоков:", export_flows_to_csv("new/example.pcap", "pcap_flows.csv"))
+
+    # Параллельный анализ всех захватов в каталоге
+    capture_set = analyze_capture_set("new", "pcap_set.csv")
+    print("Файлов:", capture_set['files'], "Уникальных IP:", len(capture_set['ips']))
\ No newline at end of file
@@ -9,6 +9,9 @@ Key Features:
 3. Валидация схем (XSD)
 4. Конвертация в JSON/CSV
 5. Поиск аномалий в структуре
+6. Потоковая обработка больших XML (iterparse) за один проход
+7. Конвертация в CSV/JSON Lines/Parquet по декларативному описанию полей
+8. Кэш скомпилированных XSD-схем, пакетная и потоковая валидация
 
 Типичные кейсы:
 - Анализ RSS-лент и новостных потоков
@@ -17,8 +20,32 @@ Key Features:
 """
 
 import xml.etree.ElementTree as ET
+import csv
 import json
+import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Число записей в одной пачке при потоковой конвертации
+XML_BATCH_SIZE = 10000
+
+# Преобразователи типов для описания полей
+FIELD_TYPES = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': lambda value: value.lower() in ('1', 'true', 'yes'),
+}
+
+# Скомпилированные XSD-схемы: (путь, mtime) -> XMLSchema (свой кэш в каждом процессе)
+_XSD_CACHE = {}
+
+# Описание полей записи <user> (путь, тип, обязательность)
+USER_FIELDS = {
+    'name': 'name',
+    'age': ('age', 'int'),
+    'country': ('country', 'str', False),
+}
 
 def read_xml(filepath):
     """Чтение XML-файла."""
@@ -63,18 +90,86 @@ def validate_xml_schema(xml_filepath, xsd_filepath):
     """Валидация XML по XSD-схеме (требуется lxml)."""
     try:
         from lxml import etree
-        with open(xsd_filepath, 'r') as f:
-            schema_root = etree.XML(f.read())
-        schema = etree.XMLSchema(schema_root)
-        
-        with open(xml_filepath, 'r') as f:
-            xml_doc = etree.parse(f)
-        
+        schema = load_xsd_schema(xsd_filepath)
+        xml_doc = etree.parse(xml_filepath)
         return schema.validate(xml_doc)
     except ImportError:
         print("Установите lxml: pip install lxml")
         return False
 
+def load_xsd_schema(xsd_filepath):
+    """Скомпилированная XSD-схема из кэша; перекомпиляция только при изменении файла (требуется lxml)."""
+    from lxml import etree
+    path = os.path.abspath(xsd_filepath)
+    key = (path, os.stat(path).st_mtime_ns)
+    schema = _XSD_CACHE.get(key)
+    if schema is None:
+        schema = etree.XMLSchema(etree.parse(path))
+        # Устаревшие версии той же схемы больше не нужны
+        for old_key in [k for k in _XSD_CACHE if k[0] == path]:
+            del _XSD_CACHE[old_key]
+        _XSD_CACHE[key] = schema
+    return schema
+
+def _xsd_errors(error_log):
+    """Ошибки валидации в виде списка словарей."""
+    return [{'line': e.line, 'column': e.column, 'level': e.level_name, 'type': e.type_name,
+             'path': e.path, 'message': e.message} for e in error_log]
+
+def validate_xml_file(xml_filepath, xsd_filepath):
+    """Валидация файла с подробным списком ошибок (требуется lxml)."""
+    from lxml import etree
+    schema = load_xsd_schema(xsd_filepath)
+    try:
+        xml_doc = etree.parse(xml_filepath)
+    except (OSError, etree.XMLSyntaxError) as e:
+        # Ошибка разбора: журнал парсера общий для потока, поэтому берём данные из исключения
+        line, column = getattr(e, 'position', (None, None))
+        return {'file': xml_filepath, 'valid': False,
+                'errors': [{'line': line, 'column': column, 'level': 'FATAL', 'type': 'PARSE',
+                            'path': None, 'message': getattr(e, 'msg', None) or str(e)}]}
+    valid = schema.validate(xml_doc)
+    return {'file': xml_filepath, 'valid': valid, 'errors': _xsd_errors(schema.error_log)}
+
+def _validate_xml_batch(xml_filepaths, xsd_filepath):
+    """Валидация пачки файлов в процессе-обработчике (схема компилируется один раз на процесс)."""
+    return [validate_xml_file(path, xsd_filepath) for path in xml_filepaths]
+
+def validate_xml_files(xml_filepaths, xsd_filepath, workers=None, batch_size=50):
+    """Пакетная валидация множества файлов по одной схеме в пуле процессов (требуется lxml)."""
+    try:
+        load_xsd_schema(xsd_filepath)
+    except ImportError:
+        print("Установите lxml: pip install lxml")
+        return []
+    xml_filepaths = list(xml_filepaths)
+    batches = [xml_filepaths[i:i + batch_size] for i in range(0, len(xml_filepaths), batch_size)]
+    if workers == 1 or len(batches) <= 1:
+        return [result for batch in batches for result in _validate_xml_batch(batch, xsd_filepath)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_validate_xml_batch, batches, [xsd_filepath] * len(batches))
+        return [result for batch in results for result in batch]
+
+def validate_xml_records(xml_filepath, xsd_filepath, record_tag='user'):
+    """Потоковая валидация записей большого документа: генератор ошибок по невалидным записям.
+
+    Схема должна описывать запись (например, <user>) как глобальный элемент.
+    """
+    try:
+        from lxml import etree
+    except ImportError:
+        print("Установите lxml: pip install lxml")
+        return
+    schema = load_xsd_schema(xsd_filepath)
+    context = etree.iterparse(xml_filepath, events=('end',), tag=f'{{*}}{record_tag}')
+    for number, (_, elem) in enumerate(context, 1):
+        if not schema.validate(elem):
+            yield {'record': number, 'line': elem.sourceline, 'errors': _xsd_errors(schema.error_log)}
+        # Освобождение обработанных записей
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
 def find_anomalies_in_xml(filepath):
     """Поиск аномалий в структуре XML (например, отсутствующие теги)."""
     tree = read_xml(filepath)
@@ -88,6 +183,204 @@ def find_anomalies_in_xml(filepath):
     
     return issues
 
+def _local_name(tag):
+    """Имя тега без пространства имён."""
+    return tag.rsplit('}', 1)[-1]
+
+def iter_xml_records(filepath, record_path='user', on_event=None):
+    """Потоковый обход записей по пути (например, 'channel/item') с очисткой обработанных элементов.
+
+    on_event(event, elem) вызывается для каждого события 'start'/'end' всего
+    документа (в том числе вне записей) до очистки элемента.
+    """
+    target = [_local_name(part) for part in record_path.strip('/').split('/')]
+    path = []
+    elems = []
+    record_depth = 0
+    for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+        if on_event:
+            on_event(event, elem)
+        if event == 'start':
+            path.append(_local_name(elem.tag))
+            elems.append(elem)
+            if not record_depth and path[-len(target):] == target:
+                record_depth = len(path)
+            continue
+
+        depth = len(path)
+        path.pop()
+        elems.pop()
+        if record_depth and depth > record_depth:
+            # Вложенные элементы записи нужны до её конца
+            continue
+        if depth == record_depth:
+            yield elem
+            record_depth = 0
+        elem.clear()
+        if elems:
+            elems[-1].remove(elem)
+
+def _field_spec(spec):
+    """Разбор описания поля в кортеж (путь, тип, обязательное)."""
+    spec = (spec,) if isinstance(spec, str) else tuple(spec)
+    type_name = spec[1] if len(spec) > 1 else 'str'
+    required = spec[2] if len(spec) > 2 else True
+    return spec[0], type_name, required
+
+def compile_field_extractors(fields):
+    """Компиляция описания полей в функции извлечения.
+
+    Значение описания: путь либо кортеж (путь, тип[, обязательное]).
+    Путь: '.' — текст записи, '@attr' — атрибут, 'tag' — дочерний тег,
+    'a/b' или 'a/b/@attr' — путь ElementPath.
+    """
+    extractors = []
+    for name, spec in fields.items():
+        path, type_name, required = _field_spec(spec)
+        attr = None
+        if '@' in path:
+            path, attr = path.rsplit('@', 1)
+            path = path.rstrip('/') or '.'
+        if path == '.':
+            getter = lambda elem, children: elem
+        elif '/' not in path and '[' not in path and not path.startswith('{'):
+            # Простой дочерний тег: поиск по индексу детей, построенному один раз на запись
+            getter = lambda elem, children, tag=path: children.get(tag)
+        else:
+            getter = lambda elem, children, path=path: elem.find(path)
+        extractors.append((name, getter, attr, FIELD_TYPES[type_name], required))
+    return extractors
+
+def extract_record(elem, extractors, number):
+    """Значения полей одной записи и список найденных аномалий."""
+    children = {}
+    for child in elem:
+        children.setdefault(_local_name(child.tag), child)
+    row = {}
+    issues = []
+    for name, getter, attr, convert, required in extractors:
+        node = getter(elem, children)
+        value = None
+        if node is None or (attr is not None and node.get(attr) is None):
+            if required:
+                issues.append(f"Нет поля '{name}' в записи {number}")
+        else:
+            text = node.get(attr) if attr is not None else node.text
+            if text is not None and text.strip():
+                try:
+                    value = convert(text.strip())
+                except ValueError:
+                    issues.append(f"Некорректное значение '{name}' в записи {number}: {text.strip()!r}")
+        row[name] = value
+    return row, issues
+
+def iter_record_batches(filepath, record_path, fields, batch_size=XML_BATCH_SIZE):
+    """Пачки типизированных столбцов и аномалий из потока записей."""
+    extractors = compile_field_extractors(fields)
+    names = [name for name, *_ in extractors]
+    columns = {name: [] for name in names}
+    issues = []
+    count = 0
+    for number, elem in enumerate(iter_xml_records(filepath, record_path), 1):
+        row, problems = extract_record(elem, extractors, number)
+        for name in names:
+            columns[name].append(row[name])
+        issues.extend(problems)
+        count += 1
+        if count >= batch_size:
+            yield columns, issues
+            columns = {name: [] for name in names}
+            issues = []
+            count = 0
+    if count or issues:
+        yield columns, issues
+
+def _open_table_sink(output_file, output_format, fields):
+    """Приёмник столбцов: функция записи пачки и функция закрытия."""
+    names = list(fields)
+    if output_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        arrow_types = {'str': pa.string(), 'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_()}
+        schema = pa.schema([(name, arrow_types[_field_spec(spec)[1]]) for name, spec in fields.items()])
+        writer = pq.ParquetWriter(output_file, schema)
+        write = lambda columns: writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        return write, writer.close
+
+    f = open(output_file, 'w', newline='', encoding='utf-8')
+    if output_format == 'jsonl':
+        def write(columns):
+            for values in zip(*(columns[name] for name in names)):
+                f.write(json.dumps(dict(zip(names, values)), ensure_ascii=False) + '\n')
+    else:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        write = lambda columns: writer.writerows(zip(*(columns[name] for name in names)))
+    return write, f.close
+
+def convert_xml(xml_filepath, output_file, record_path, fields, output_format='csv', batch_size=XML_BATCH_SIZE):
+    """Конвертация XML в CSV/JSON Lines/Parquet по описанию полей с поиском аномалий за один проход."""
+    write, close = _open_table_sink(output_file, output_format, fields)
+    records = 0
+    anomalies = []
+    try:
+        for columns, issues in iter_record_batches(xml_filepath, record_path, fields, batch_size):
+            write(columns)
+            records += len(next(iter(columns.values()), []))
+            anomalies.extend(issues)
+    finally:
+        close()
+    return {'records': records, 'anomalies': anomalies}
+
+def process_xml_stream(xml_filepath, json_filepath=None, csv_filepath=None, tags=(),
+                       record_path='user', fields=USER_FIELDS):
+    """Конвертация в JSON/CSV, извлечение тегов и поиск аномалий за один проход по файлу."""
+    extractors = compile_field_extractors(fields)
+    names = list(fields)
+    found = {tag: [] for tag in tags}
+    open_tags = []
+    root = []
+    anomalies = []
+
+    def collect_tag(event, elem):
+        # Теги собираются по всему документу в порядке открытия, как в extract_xml_tags (без корня)
+        if not root:
+            root.append(elem)
+        if elem.tag not in found or elem is root[0]:
+            return
+        if event == 'start':
+            found[elem.tag].append(None)
+            open_tags.append(len(found[elem.tag]) - 1)
+        else:
+            found[elem.tag][open_tags.pop()] = elem.text
+
+    json_file = open(json_filepath, 'w', encoding='utf-8') if json_filepath else None
+    csv_file = open(csv_filepath, 'w', newline='', encoding='utf-8') if csv_filepath else None
+    csv_writer = csv.writer(csv_file) if csv_file else None
+    if csv_writer:
+        csv_writer.writerow(names)
+    if json_file:
+        json_file.write('[')
+    count = 0
+    try:
+        records = iter_xml_records(xml_filepath, record_path, collect_tag if tags else None)
+        for number, elem in enumerate(records, 1):
+            row, issues = extract_record(elem, extractors, number)
+            anomalies.extend(issues)
+            if json_file:
+                json_file.write((',\n' if count else '\n') + json.dumps(row, ensure_ascii=False))
+            if csv_writer:
+                csv_writer.writerow(row[name] for name in names)
+            count += 1
+        if json_file:
+            json_file.write('\n]' if count else ']')
+    finally:
+        if json_file:
+            json_file.close()
+        if csv_file:
+            csv_file.close()
+    return {'records': count, 'tags': found, 'anomalies': anomalies}
+
 if __name__ == "__main__":
     # Тестовые данные
     TEST_XML = """<?xml version="1.0"?>
@@ -111,4 +404,35 @@ if __name__ == "__main__":
     print("Имена:", extract_xml_tags("test_data.xml", "name"))
     xml_to_json("test_data.xml", "test_data.json")
     xml_to_csv("test_data.xml", "test_data.csv")
-    print("Аномалии:", find_anomalies_in_xml("test_data.xml"))
\ No newline at end of file
+    print("Аномалии:", find_anomalies_in_xml("test_data.xml"))
+
+    # Один проход: JSON, CSV, теги и аномалии
+    result = process_xml_stream("test_data.xml", "test_data_stream.json", "test_data_stream.csv", tags=("name",))
+    print("Потоковая обработка:", result)
+    print("Конвертация по описанию полей:",
+          convert_xml("test_data.xml", "test_data.jsonl", "users/user", USER_FIELDS, output_format='jsonl'))
+
+    # Валидация по XSD: схема компилируется один раз и берётся из кэша
+    TEST_XSD = """<?xml version="1.0"?>
+    <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+        <xs:element name="user">
+            <xs:complexType>
+                <xs:sequence>
+                    <xs:element name="name" type="xs:string"/>
+                    <xs:element name="age" type="xs:int"/>
+                    <xs:element name="country" type="xs:string" minOccurs="0"/>
+                </xs:sequence>
+            </xs:complexType>
+        </xs:element>
+        <xs:element name="users">
+            <xs:complexType>
+                <xs:sequence>
+                    <xs:element ref="user" maxOccurs="unbounded"/>
+                </xs:sequence>
+            </xs:complexType>
+        </xs:element>
+    </xs:schema>"""
+    with open("test_data.xsd", 'w') as f:
+        f.write(TEST_XSD.strip())
+    print("Валидация файлов:", validate_xml_files(["test_data.xml"], "test_data.xsd"))
+    print("Невалидные записи:", list(validate_xml_records("test_data.xml", "test_data.xsd")))
\ No newline at end of file
@@ -9,6 +9,9 @@ Key Features:
 3. Извлечение данных по ключам
 4. Конвертация в JSON/CSV
 5. Анализ конфигов инструментов (Maltego, SpiderFoot)
+6. Быстрая загрузка (LibYAML) с кэшем разобранных документов
+7. Параллельный разбор каталогов и ленивое чтение многодокументных файлов
+8. Пакетная валидация документов и записей с кэшем скомпилированных схем
 
 Типичные кейсы:
 - Парсинг конфигурационных файлов
@@ -17,14 +20,99 @@ Key Features:
 """
 
 import yaml
+import glob
 import json
+import os
 import pandas as pd
-from jsonschema import validate, ValidationError
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from jsonschema import validators
+from jsonschema.exceptions import best_match
+
+# Безопасный загрузчик на C (LibYAML), если PyYAML собран с ним
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Максимальное число разобранных документов в кэше
+YAML_CACHE_SIZE = 4096
+
+# Кэш разобранных документов: путь -> (отпечаток файла, данные)
+_YAML_CACHE = OrderedDict()
+
+# Скомпилированные валидаторы JSON Schema: (путь, mtime) -> Draft*Validator
+_VALIDATOR_CACHE = {}
+
+# Число записей в одной задаче при параллельной валидации
+VALIDATION_CHUNK_SIZE = 5000
 
 def read_yaml(filepath):
     """Чтение YAML-файла."""
     with open(filepath, 'r') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=YAML_LOADER)
+
+def yaml_fingerprint(filepath):
+    """Отпечаток файла: размер и время изменения."""
+    stat = os.stat(filepath)
+    return (stat.st_size, stat.st_mtime_ns)
+
+def _cache_yaml(path, fingerprint, data):
+    """Сохранение документа в кэш с вытеснением самых старых записей."""
+    _YAML_CACHE[path] = (fingerprint, data)
+    _YAML_CACHE.move_to_end(path)
+    while len(_YAML_CACHE) > YAML_CACHE_SIZE:
+        _YAML_CACHE.popitem(last=False)
+
+def load_yaml(filepath):
+    """Чтение YAML с кэшем по отпечатку файла (результат общий, его не следует изменять)."""
+    path = os.path.abspath(filepath)
+    fingerprint = yaml_fingerprint(path)
+    cached = _YAML_CACHE.get(path)
+    if cached is not None and cached[0] == fingerprint:
+        _YAML_CACHE.move_to_end(path)
+        return cached[1]
+    data = read_yaml(path)
+    _cache_yaml(path, fingerprint, data)
+    return data
+
+def iter_yaml_documents(filepath):
+    """Ленивое чтение многодокументного YAML (документы разделены '---')."""
+    with open(filepath, 'r') as f:
+        yield from yaml.load_all(f, Loader=YAML_LOADER)
+
+def _parse_yaml_file(path):
+    """Разбор одного файла в процессе-обработчике."""
+    try:
+        fingerprint = yaml_fingerprint(path)
+        return path, fingerprint, read_yaml(path), None
+    except (OSError, UnicodeDecodeError, yaml.YAMLError) as e:
+        return path, None, None, str(e)
+
+def load_yaml_directory(directory, patterns=('*.yaml', '*.yml'), workers=None, recursive=True):
+    """Разбор всех YAML-файлов каталога в пуле процессов; неизменённые файлы берутся из кэша."""
+    paths = set()
+    for pattern in patterns:
+        pattern = os.path.join(directory, '**', pattern) if recursive else os.path.join(directory, pattern)
+        paths.update(os.path.abspath(p) for p in glob.glob(pattern, recursive=recursive))
+
+    documents = {}
+    errors = {}
+    pending = []
+    for path in sorted(paths):
+        cached = _YAML_CACHE.get(path)
+        if cached is not None and cached[0] == yaml_fingerprint(path):
+            documents[path] = cached[1]
+        else:
+            pending.append(path)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(pending) // ((workers or os.cpu_count() or 1) * 4))
+            for path, fingerprint, data, error in pool.map(_parse_yaml_file, pending, chunksize=chunksize):
+                if error is not None:
+                    errors[path] = error
+                else:
+                    documents[path] = data
+                    _cache_yaml(path, fingerprint, data)
+    return {'documents': documents, 'errors': errors}
 
 def write_yaml(data, filepath):
     """Запись YAML-файла."""
@@ -33,34 +121,106 @@ def write_yaml(data, filepath):
 
 def filter_yaml_by_key(filepath, key, value):
     """Фильтрация YAML по ключу и значению."""
-    data = read_yaml(filepath)
+    data = load_yaml(filepath)
     return [item for item in data.get('items', []) if item.get(key) == value]
 
 def yaml_to_json(yaml_filepath, json_filepath):
     """Конвертация YAML в JSON."""
-    data = read_yaml(yaml_filepath)
+    data = load_yaml(yaml_filepath)
     with open(json_filepath, 'w') as f:
         json.dump(data, f, indent=4)
 
 def yaml_to_csv(yaml_filepath, csv_filepath):
     """Конвертация YAML в CSV."""
-    data = read_yaml(yaml_filepath)['items']
+    data = load_yaml(yaml_filepath)['items']
     pd.DataFrame(data).to_csv(csv_filepath, index=False)
 
 def validate_yaml_schema(yaml_filepath, schema_filepath):
     """Валидация YAML по JSON Schema."""
-    with open(yaml_filepath, 'r') as f:
-        data = yaml.safe_load(f)
+    data = load_yaml(yaml_filepath)
     
-    with open(schema_filepath, 'r') as f:
-        schema = json.load(f)
-    
-    try:
-        validate(instance=data, schema=schema)
+    # Валидатор строится один раз на схему и берётся из кэша
+    error = best_match(load_schema_validator(schema_filepath).iter_errors(data))
+    if error is None:
         return True
-    except ValidationError as e:
-        print(f"Ошибка валидации: {e}")
-        return False
+    print(f"Ошибка валидации: {error}")
+    return False
+
+def _load_document(filepath):
+    """Загрузка JSON- или YAML-документа (YAML — через кэш)."""
+    if filepath.lower().endswith('.json'):
+        with open(filepath, 'r') as f:
+            return json.load(f)
+    return load_yaml(filepath)
+
+def load_schema_validator(schema_filepath):
+    """Скомпилированный валидатор JSON Schema из кэша; схема проверяется один раз."""
+    path = os.path.abspath(schema_filepath)
+    key = (path, os.stat(path).st_mtime_ns)
+    validator = _VALIDATOR_CACHE.get(key)
+    if validator is None:
+        schema = _load_document(path)
+        cls = validators.validator_for(schema)
+        cls.check_schema(schema)
+        validator = cls(schema)
+        for old_key in [k for k in _VALIDATOR_CACHE if k[0] == path]:
+            del _VALIDATOR_CACHE[old_key]
+        _VALIDATOR_CACHE[key] = validator
+    return validator
+
+def _schema_errors(validator, instance):
+    """Все ошибки валидации экземпляра в виде списка словарей."""
+    return [{'path': list(e.absolute_path), 'message': e.message, 'validator': e.validator,
+             'schema_path': list(e.absolute_schema_path)} for e in validator.iter_errors(instance)]
+
+def _validate_document_batch(filepaths, schema_filepath):
+    """Валидация пачки документов в процессе-обработчике."""
+    validator = load_schema_validator(schema_filepath)
+    results = []
+    for path in filepaths:
+        try:
+            errors = _schema_errors(validator, _load_document(path))
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            errors = [{'path': [], 'message': str(e), 'validator': 'parse', 'schema_path': []}]
+        results.append({'file': path, 'valid': not errors, 'errors': errors})
+    return results
+
+def validate_documents(filepaths, schema_filepath, workers=None, batch_size=100):
+    """Пакетная валидация YAML/JSON-документов по одной схеме, при нескольких пачках — в пуле процессов."""
+    filepaths = list(filepaths)
+    batches = [filepaths[i:i + batch_size] for i in range(0, len(filepaths), batch_size)]
+    if workers == 1 or len(batches) <= 1:
+        return [r for batch in batches for r in _validate_document_batch(batch, schema_filepath)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_validate_document_batch, batches, [schema_filepath] * len(batches))
+        return [r for batch in results for r in batch]
+
+def _validate_item_chunk(items, schema_filepath, offset):
+    """Валидация части записей; возвращает только невалидные записи."""
+    validator = load_schema_validator(schema_filepath)
+    invalid = []
+    for index, item in enumerate(items, offset):
+        errors = _schema_errors(validator, item)
+        if errors:
+            invalid.append({'index': index, 'errors': errors})
+    return invalid
+
+def validate_items(source, schema_filepath, items_key='items', workers=1, chunk_size=VALIDATION_CHUNK_SIZE):
+    """Валидация каждой записи списка (например, items) по схеме записи; workers > 1 — в пуле процессов.
+
+    source — путь к YAML/JSON-файлу или уже загруженный список записей.
+    """
+    items = source
+    if isinstance(source, str):
+        data = _load_document(source)
+        items = data.get(items_key, []) if isinstance(data, dict) else data
+    if workers == 1 or len(items) <= chunk_size:
+        return _validate_item_chunk(items, schema_filepath, 0)
+    offsets = range(0, len(items), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_validate_item_chunk, [items[i:i + chunk_size] for i in offsets],
+                           [schema_filepath] * len(offsets), offsets)
+        return [r for chunk in results for r in chunk]
 
 def parse_maltego_config(config_path):
     """Парсинг конфига Maltego."""
@@ -85,4 +245,29 @@ if __name__ == "__main__":
     # Демонстрация
     print("Пользователи из USA:", filter_yaml_by_key("test_data.yaml", "country", "USA"))
     yaml_to_json("test_data.yaml", "test_data.json")
-    yaml_to_csv("test_data.yaml", "test_data.csv")
\ No newline at end of file
+    yaml_to_csv("test_data.yaml", "test_data.csv")
+
+    # Загрузчик: C-версия LibYAML, если доступна
+    print("Загрузчик YAML:", YAML_LOADER.__name__)
+
+    # Многодокументный поток читается лениво
+    with open("test_multi.yaml", 'w') as f:
+        f.write("name: Alice\n---\nname: Bob\n")
+    print("Документы:", list(iter_yaml_documents("test_multi.yaml")))
+
+    # Каталог конфигов: разбор в пуле процессов, повторный вызов — из кэша
+    os.makedirs("yaml_configs", exist_ok=True)
+    for i in range(3):
+        write_yaml({'transforms': [f"transform_{i}"]}, f"yaml_configs/config_{i}.yaml")
+    result = load_yaml_directory("yaml_configs", workers=2)
+    print("Разобрано конфигов:", len(result['documents']), "ошибок:", len(result['errors']))
+
+    # Пакетная валидация: валидатор схемы строится один раз
+    ITEM_SCHEMA = {
+        'type': 'object',
+        'properties': {'name': {'type': 'string'}, 'age': {'type': 'integer', 'minimum': 0}},
+        'required': ['name', 'age'],
+    }
+    with open("test_item_schema.json", 'w') as f:
+        json.dump(ITEM_SCHEMA, f, indent=4)
+    print("Невалидные записи:", validate_items("test_data.yaml", "test_item_schema.json"))
\ No newline at end of file
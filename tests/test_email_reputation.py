@@ -0,0 +1,144 @@
+"""
+Тесты пакетной проверки репутации отправителей (email_examples.check_senders_reputation).
+
+Запросы идут на локальный HTTP-сервер-заглушку, сеть не нужна:
+python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'new'))
+
+from email_examples import TokenBucket, check_senders_reputation
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Ответ зависит от префикса адреса: ok, limited (429 один раз), missing (404), down (503),
+    garbled (200 не-JSON), flaky (не-JSON один раз), loop (перенаправление на себя)."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        email = parse_qs(urlparse(self.path).query)['email'][0]
+        with self.server.lock:
+            self.server.calls.append(email)
+            attempt = self.server.calls.count(email)
+        if email.startswith('limited') and attempt == 1:
+            self._reply(429, headers={'Retry-After': '1'})
+        elif email.startswith('missing'):
+            self._reply(404)
+        elif email.startswith('down'):
+            self._reply(503)
+        elif email.startswith('garbled') or (email.startswith('flaky') and attempt == 1):
+            self._reply(200, body=b'<html>proxy error</html>')
+        elif email.startswith('loop'):
+            self._reply(302, headers={'Location': self.path})
+        else:
+            self._reply(200, {'data': {'email': email, 'status': 'valid'}})
+
+    def _reply(self, status, payload=None, headers=None, body=b''):
+        if payload is not None:
+            body = json.dumps(payload).encode()
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class SenderReputationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.calls = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_url = f"http://127.0.0.1:{cls.server.server_port}/v2/email-verifier"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.calls.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, 'reputation.db')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def check(self, addresses, **kwargs):
+        options = {'cache_path': self.cache_path, 'rate': 100, 'backoff': 0.01, 'api_url': self.api_url}
+        options.update(kwargs)
+        return check_senders_reputation(addresses, 'key', **options)
+
+    def test_deduplicates_and_serves_repeat_from_cache(self):
+        results = self.check(['ok1@x.com', 'OK1@x.com ', 'ok2@x.com', 'ok1@x.com'])
+        self.assertEqual(sorted(results), ['ok1@x.com', 'ok2@x.com'])
+        self.assertEqual(results['ok1@x.com']['data']['status'], 'valid')
+        self.assertEqual(len(self.server.calls), 2)
+
+        again = self.check(['ok1@x.com', 'ok2@x.com'])
+        self.assertEqual(again, results)
+        self.assertEqual(len(self.server.calls), 2)
+
+    def test_expired_cache_entries_are_refetched(self):
+        self.check(['ok@x.com'], ttl=0)
+        self.check(['ok@x.com'], ttl=0)
+        self.assertEqual(self.server.calls, ['ok@x.com', 'ok@x.com'])
+
+    def test_retries_after_429_honouring_retry_after(self):
+        start = time.monotonic()
+        results = self.check(['limited@x.com'])
+        self.assertGreaterEqual(time.monotonic() - start, 1.0)
+        self.assertEqual(results['limited@x.com']['data']['email'], 'limited@x.com')
+        self.assertEqual(self.server.calls, ['limited@x.com', 'limited@x.com'])
+
+    def test_client_error_is_not_retried_or_cached(self):
+        self.assertIsNone(self.check(['missing@x.com'])['missing@x.com'])
+        self.assertIsNone(self.check(['missing@x.com'])['missing@x.com'])
+        self.assertEqual(self.server.calls, ['missing@x.com', 'missing@x.com'])
+
+    def test_server_errors_are_retried_then_give_up(self):
+        self.assertIsNone(self.check(['down@x.com'], retries=2)['down@x.com'])
+        self.assertEqual(len(self.server.calls), 3)
+
+    def test_malformed_json_is_retried(self):
+        results = self.check(['flaky@x.com', 'garbled@x.com', 'ok@x.com'], retries=2)
+        self.assertEqual(results['flaky@x.com']['data']['email'], 'flaky@x.com')
+        self.assertIsNone(results['garbled@x.com'])
+        self.assertEqual(results['ok@x.com']['data']['status'], 'valid')
+        self.assertEqual(self.server.calls.count('garbled@x.com'), 3)
+
+    def test_redirect_loop_does_not_abort_batch(self):
+        results = self.check(['loop@x.com', 'ok@x.com'])
+        self.assertIsNone(results['loop@x.com'])
+        self.assertEqual(results['ok@x.com']['data']['status'], 'valid')
+
+    def test_rate_limit_spaces_requests(self):
+        # Первые 10 токенов доступны сразу, остальные 10 запросов растягиваются на секунду
+        addresses = [f"ok{i}@x.com" for i in range(20)]
+        start = time.monotonic()
+        results = self.check(addresses, rate=10, workers=10)
+        self.assertEqual(len(results), 20)
+        self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(11):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Тесты рекурсивного обхода вложенных архивов (archive_examples.walk_nested_archive).
+
+Проверки 7z пропускаются, если py7zr не установлен:
+python -m pytest tests
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'new'))
+
+from archive_examples import walk_nested_archive
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+class NestedArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_bad_member_does_not_abort_siblings(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as z:
+            z.writestr('good1.txt', 'a' * 100)
+            z.writestr('bad.txt', 'b' * 100)
+            z.writestr('good2.txt', 'c' * 100)
+        data = bytearray(buf.getvalue())
+        # Порча содержимого без изменения заголовков: ошибка CRC при чтении
+        data[data.index(b'b' * 100)] = ord('X')
+        with open(self.path('crc.zip'), 'wb') as f:
+            f.write(data)
+
+        entries = {e['path']: e for e in walk_nested_archive(self.path('crc.zip'))}
+        self.assertEqual(list(entries), ['crc.zip!good1.txt', 'crc.zip!bad.txt', 'crc.zip!good2.txt'])
+        self.assertIn('CRC', entries['crc.zip!bad.txt']['error'])
+        self.assertEqual(entries['crc.zip!good2.txt']['data'], b'c' * 100)
+
+    @unittest.skipIf(py7zr is None, "py7zr не установлен")
+    def test_7z_members_are_extracted_in_one_pass(self):
+        with py7zr.SevenZipFile(self.path('solid.7z'), 'w') as z:
+            for i in range(20):
+                z.writestr(f"line {i}\n".encode() * 100, f"f{i:02}.txt")
+            z.writestr(b'x' * 5000, 'big.bin')
+
+        extract = py7zr.SevenZipFile.extract
+        with mock.patch.object(py7zr.SevenZipFile, 'extract', autospec=True, side_effect=extract) as spy:
+            entries = {e['path']: e for e in walk_nested_archive(self.path('solid.7z'), max_member_size=4000)}
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(len(entries), 21)
+        self.assertEqual(entries['solid.7z!f07.txt']['data'], b"line 7\n" * 100)
+        self.assertEqual(entries['solid.7z!big.bin']['error'], 'файл превышает лимит размера')
+
+    @unittest.skipIf(py7zr is None, "py7zr не установлен")
+    def test_7z_total_limit(self):
+        with py7zr.SevenZipFile(self.path('many.7z'), 'w') as z:
+            for i in range(5):
+                z.writestr(b'y' * 1000, f"f{i}.txt")
+
+        entries = list(walk_nested_archive(self.path('many.7z'), max_total_size=2500))
+        self.assertEqual(sum(1 for e in entries if 'data' in e), 2)
+        self.assertEqual(sum(1 for e in entries if e.get('error')), 3)
+
+if __name__ == "__main__":
+    unittest.main()